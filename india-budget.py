@@ -1,17 +1,24 @@
+import json
 import pandas as pd
-from datetime import datetime
-import plotly.express as px
-from plotly.subplots import make_subplots
-import plotly.graph_objects as go
 import streamlit as st
-import io
-import msoffcrypto
-import numpy as np
-import re
+from streamlit.logger import get_logger
 import time
-import colorsys
+from india_accounts.config import FRAME_SOURCE
+from india_accounts.dataset import DataStore
+from india_accounts.figcache import FigureCache
+from india_accounts.figures import build_animated_figure, build_animation_frames, build_figure_template, fill_figure
+from india_accounts.partition import TIME_SCALES
+from india_accounts.timing import RunTimer, StageTimings
+from india_accounts.titles import get_financial_year, get_title
+from india_accounts.warmup import WarmUpThread
+from india_accounts.watcher import WorkbookWatcher
+
+logger = get_logger("india_budget")
 
 pd.set_option('future.no_silent_downcasting', True)
+# Datasets are shared by every session; with copy-on-write a frame derived
+# from one (a date's rows, a column) can never write through to it
+pd.set_option('mode.copy_on_write', True)
 pd.set_option('display.max_columns', None)
 st.set_page_config(
 	layout="wide",
@@ -53,196 +60,49 @@ hide_st_style = '''
 st.markdown(hide_st_style, unsafe_allow_html=True)
 
 
-#List for defining sorting order for "Account Summary" & "Tax Details"
-main_cat_order_list = [
-	"Revenue Receipts",
-	"Rev Recp - Tax Revenue Net",
-	"Rev Recp - Non Tax Revenue",
-	"Non Debt Capital Receipt",
-	"Non Debt - Recovery of Loans",
-	"Non Debt - Other Receipt",
-	"Total Recp - RevRecp Plus NonDebtRecp",
-	"Revenue Expenditure",
-	"Rev Exp - Interest Payments",
-	"Capital Expenditure",
-	"Cap Exp - Loan Disbursed",
-	"Total Exp - RevExp + CapExp",
-	"Fiscal Deficit - TotalExp Minus TotalRecp",
-	"Revenue Deficit - RevExp Minus RevRecp",
-	"Primary Deficit - FisicalDef Minus InterestPay"
-]
-
-tax_order_list = [
-	"Gross Tax Revenue",
-	"Corporation Tax",
-	"Income Tax",
-	"Goods & Service Tax",
-	"UT GST",
-	"Customs",
-	"Union Excise Duties",
-	"Service Tax",
-	"Other Taxes",
-	"NCCD to NDRF",
-	"Assignment to States",
-	"GST Comp Cess",
-	"IGST"
-]
-
-nontax_order_list = [
-	"A.Interest Receipts",
-	"B.Dividend & Profits",
-	"C.NonTaxRev of UTs",
-	"D.Fiscal Services Net",
-	"D.General Services Net",
-	"D.Social Services",
-	"D.Economic Services Net",
-	"D.Grant in Aid",
-	"Total of D",
-	"Total NonTax Rev"
-]
-
-nondebt_order_list = [
-	"Gross Recoveries",
-	"Less Recoveries of Ways&Means Adv&Loans to Govt Emp",
-	"Less Expenditure Netted",
-	"Less Short Term Loans",
-	"Net Recoveries Loans",
-	"Net Issue of Bonus Share",
-	"Misc Cap Receipts",
-	"Misc-Other Receipts",
-	"Misc-Issue Bonds & Shares",
-	"Misc-Disinvestment Govt Equity",
-	"Misc-Monetization of Highways",
-	"Misc-Disinvestment Govt Equity in PSB & FIs",
-	"Misc-Listing Insurance Co",
-	"Total Non Debt Receipts"
-]
-
-financing_order_list = [
-	"External Financing",
-	"Domestic Financing",
-	"Market Borrowing",
-	"Securities Against Small Savings",
-	"State Provident Funds",
-	"Special Deposits",
-	"National Small Saving Fund",
-	"Saving Deposit and Certificates",
-	"Public Provident Funds",
-	"Investment in Securities",
-	"Income or Expenditure of NSSF",
-	"Others",
-	"Cash Balance (Decrease / Increase)",
-	"Total Financing"
-]
-
-subsidy_order_list = [
-    "Food Subsidy",
-    "Nutrient Based Fertilizers Subsidy",
-    "Urea Subsidy",
-    "Petroleum",
-    "Total Major Subsidies"
-]
-
-
-
-
-# Load file function
-@st.cache_data
-def loadfilemain():
-	password = st.secrets["db_password"]
-	excel_content = io.BytesIO()
-	with open("T01_Main.xlsx", 'rb') as f:
-		excel = msoffcrypto.OfficeFile(f)
-		excel.load_key(password)
-		excel.decrypt(excel_content)
-	
-	# Loading data from excel file
-	df = pd.read_excel(excel_content, sheet_name="Sheet1")
-	return df
-
-# Load file function
-@st.cache_data
-def loadfiletax():
-	password = st.secrets["db_password"]
-	excel_content = io.BytesIO()
-	with open("T02_TAX_Details.xlsx", 'rb') as f:
-		excel = msoffcrypto.OfficeFile(f)
-		excel.load_key(password)
-		excel.decrypt(excel_content)
-	
-	# Loading data from excel file
-	df = pd.read_excel(excel_content, sheet_name="Sheet1")
-	return df
-
-# Load file function
-@st.cache_data
-def loadfilenontax():
-	password = st.secrets["db_password"]
-	excel_content = io.BytesIO()
-	with open("T03_NonTAX_Details.xlsx", 'rb') as f:
-		excel = msoffcrypto.OfficeFile(f)
-		excel.load_key(password)
-		excel.decrypt(excel_content)
-	
-	# Loading data from excel file
-	df = pd.read_excel(excel_content, sheet_name="Sheet1")
-	return df
-
-# Load file function
-@st.cache_data
-def loadfilenondebt():
-	password = st.secrets["db_password"]
-	excel_content = io.BytesIO()
-	with open("T04_NonDebt_Details.xlsx", 'rb') as f:
-		excel = msoffcrypto.OfficeFile(f)
-		excel.load_key(password)
-		excel.decrypt(excel_content)
-	
-	# Loading data from excel file
-	df = pd.read_excel(excel_content, sheet_name="Sheet1")
-	return df
-
- #Load file function
-@st.cache_data
-def loadfileexp():
-	password = st.secrets["db_password"]
-	excel_content = io.BytesIO()
-	with open("T12_Expenditure.xlsx", 'rb') as f:
-		excel = msoffcrypto.OfficeFile(f)
-		excel.load_key(password)
-		excel.decrypt(excel_content)
-	
-	# Loading data from excel file
-	df = pd.read_excel(excel_content, sheet_name="Sheet1")
-	return df
-
-# Load file function
-@st.cache_data
-def loadfilefinance():
-	password = st.secrets["db_password"]
-	excel_content = io.BytesIO()
-	with open("T01_Financing.xlsx", 'rb') as f:
-		excel = msoffcrypto.OfficeFile(f)
-		excel.load_key(password)
-		excel.decrypt(excel_content)
-	
-	# Loading data from excel file
-	df = pd.read_excel(excel_content, sheet_name="Sheet1")
-	return df
-
-# Load file function
-@st.cache_data
-def loadfilesubsidies():
-	password = st.secrets["db_password"]
-	excel_content = io.BytesIO()
-	with open("T01_Subsidies.xlsx", 'rb') as f:
-		excel = msoffcrypto.OfficeFile(f)
-		excel.load_key(password)
-		excel.decrypt(excel_content)
-	
-	# Loading data from excel file
-	df = pd.read_excel(excel_content, sheet_name="Sheet1")
-	return df
+# Rendered single-frame figures shared by every session in this process
+@st.cache_resource
+def loadfigurecache():
+	return FigureCache()
+
+# Every category's dataset, shared by all sessions in this process. A workbook
+# replaced on disk is re-ingested by a background watcher and swapped in whole;
+# that category's cached figures are then dropped. With the "sqlite" frame
+# source, frames are queried from the database instead, which is rebuilt by
+# python -m india_accounts.sqlstore and picked up by its version.
+@st.cache_resource
+def loaddatastore():
+	if FRAME_SOURCE == "sqlite":
+		from india_accounts.sqlstore import SqlStore
+		return SqlStore()
+	store = DataStore(st.secrets["db_password"])
+	figure_cache = loadfigurecache()
+	store.subscribe(lambda category, dataset: figure_cache.discard(lambda key: key[0][0] == category))
+	WorkbookWatcher(store).start()
+	return store
+
+# Decrypt every workbook in parallel and build each category's default view
+# once per server process, in the background so the first page is not held up
+# by the slowest workbook. Per-file timings are logged and kept for inspection.
+@st.cache_resource
+def warm_up_datasets():
+	warm_up = WarmUpThread(loaddatastore(), st.secrets["db_password"], snapshots=FRAME_SOURCE != "sqlite")
+	warm_up.start()
+	return warm_up
+
+# Stage timings of every session in this process
+@st.cache_resource
+def loadprocesstimings():
+	return StageTimings()
+
+if 'stage_timings' not in st.session_state:
+	st.session_state.stage_timings = StageTimings()
+
+# Times the stages of this run into the session and process histograms
+run_timer = RunTimer(st.session_state.stage_timings, loadprocesstimings())
+
+with run_timer.stage("warm_up"):
+	warm_up_datasets()
 
 
 # Main Program Starts Here
@@ -266,6 +126,9 @@ if 'selected_speed' not in st.session_state: #Animation Speed - Slow, Medium, Fa
 if 'selected_type' not in st.session_state: #Expenditure Type - All, Revenue & Capital
 	st.session_state.selected_type = None
 
+if 'selected_playback' not in st.session_state: #Playback - Server or Browser
+	st.session_state.selected_playback = None
+
 # Sidebar for category selection
 with st.sidebar:
 	selected_category = st.selectbox("Select Category", ["Account Summary", "Tax Details", "NonTax Details", "NonDebt Details", "Expenditure Details", "Subsidy Details", "Financing Details"], key='category_select', index =0)
@@ -277,8 +140,8 @@ with st.sidebar:
 # Animation basis selection dropdown
 with st.sidebar:
 	selected_animation = st.sidebar.selectbox(
-		"Select Animation Time Scale (Month/Year)",
-		["MonthEnd", "YearEnd"], key='animation_select',
+		"Select Animation Time Scale (Month/Quarter/Year)",
+		TIME_SCALES, key='animation_select',
 		index=0  # Default to 'MonthEnd'
 	)
 	if st.session_state.selected_animation != selected_animation:
@@ -306,127 +169,81 @@ speed_to_delay = {
 # Get the delay time from the dictionary based on selected animation speed
 animation_delay = speed_to_delay[selected_speed]
 
-def loaddata():
-	if selected_category == "Account Summary":
-		df = loadfilemain()
-		cat_order_list = main_cat_order_list
-	if selected_category == "Tax Details":
-		df = loadfiletax()
-		cat_order_list = tax_order_list
-	if selected_category == "NonTax Details":
-		df = loadfilenontax()
-		cat_order_list = nontax_order_list
-	if selected_category == "NonDebt Details":
-		df = loadfilenondebt()
-		cat_order_list = nondebt_order_list
-	if selected_category == "Financing Details":
-		df = loadfilefinance()
-		cat_order_list = financing_order_list
-	if selected_category == "Subsidy Details":
-		df = loadfilesubsidies()
-		cat_order_list = subsidy_order_list
-
-	# Ensure that the 'current_index' does not exceed the number of unique dates in the new dataset
-	unique_dates = df['Date'].unique()
-	if st.session_state.current_index >= len(unique_dates):
-		st.session_state.current_index = len(unique_dates) - 1  # Adjust to the last valid index
-
-	return df, cat_order_list
-
-def sort_and_filter_dataframe(df, category, top_n):
-	# Convert 'Date' to datetime
-	df['Date'] = pd.to_datetime(df['Date'], format='%d/%m/%y')
-
-	if category !='All':
-		# Filter based on the category selected by the user
-		df = df[df['Description'].str.contains(category)]
+with st.sidebar:
+	# Server replays frames from this script; Browser ships every date once as
+	# Plotly frames and animates them client side
+	selected_playback = st.sidebar.selectbox(
+		"Select Playback",
+		["Server", "Browser"], key='playback_select',
+		index=0  # Default to 'Server'
+	)
+	if st.session_state.selected_playback != selected_playback:
+		st.session_state.selected_playback = selected_playback
+		st.session_state.is_playing = False  # Auto-pause if playback changes
 
-	# Identify the latest date
-	latest_date = df['Date'].max()
+with st.sidebar:
+	# Bar labels also show the change from the same month of the previous FY
+	compare_yoy = st.sidebar.checkbox("Compare with same month last FY", key='compare_select')
 
-	# Get the ordering for the latest date based on 'BE' values for the selected category
-	top_descriptions = df[df['Date'] == latest_date].sort_values(by='BE', ascending=False)['Description'].head(top_n).tolist()
+# Styled figure skeleton per dataset version; frames only swap in the bar data.
+# Each top-N and data version is an entry, so the cache is bounded.
+@st.cache_resource(max_entries=32)
+def loadfiguretemplate(dataset_key, data_version, _axes):
+	return build_figure_template(dataset_key[0], _axes)
 
-	# Filter the DataFrame to keep only rows with descriptions in the top 15 list
-	df = df[df['Description'].isin(top_descriptions)]
 
-	# Define categorical type with top descriptions only
-	all_descriptions = pd.CategoricalDtype(categories=top_descriptions, ordered=True)
-	df['Description'] = df['Description'].astype(all_descriptions)
+#Loading Data
+# One "data" sample per run: the dataset, the Expenditure type and top-N it
+# offers, and the view they select
+with run_timer.stage("data"):
+	dataset = loaddatastore().get(selected_category)
+
+	if selected_category in ["Expenditure Details"]:
+		# Dropdown for user to choose between 'Revenue' and 'Capital'
+		with st.sidebar:
+			selected_type = st.selectbox('Select Type:', ['All','Revenue', 'Capital'], key = 'type_select', index =0)
+			if st.session_state.selected_type != selected_type:
+				st.session_state.selected_type = selected_type
+				st.session_state.is_playing = False  # Auto-pause if category changes
+
+		# Numeric input for user to specify how many top items to display
+		num_items = dataset.item_count(selected_type)
+		top_n = st.sidebar.number_input('Number of Top Items:', min_value=1, max_value=num_items, value=min(15, num_items))
+		dataset_key = (selected_category, selected_type, top_n)
+	else:
+		dataset_key = (selected_category,)
 
-	# Sort DataFrame by 'Date' and ordered 'Description'
-	df_sorted = df.sort_values(by=['Date', 'Description'],ascending=[True, False])
+	view = dataset.view(*dataset_key[1:])
+	axes, frames_by_date, totals_by_date, palette = view.axes, view.frames_by_date, view.totals_by_date, view.palette
+	# Hash of the workbook behind the dataset, so cached figures never outlive its data
+	data_version = dataset.version[:16]
+	figure_template = loadfiguretemplate(dataset_key, data_version, axes)
+	figure_cache = loadfigurecache()
 
-	return df_sorted
 
 
+with st.sidebar:
+	# From/to window over the view's months; the time scale steps within it
+	first, last = st.sidebar.select_slider(
+		"Select Date Window",
+		options=range(len(view.dates)), value=(0, len(view.dates) - 1),
+		format_func=lambda i: view.dates[i].strftime('%b %Y')
+	)
+	date_window = (view.dates[first], view.dates[last])
+	if st.session_state.get('date_window') != date_window:
+		st.session_state.date_window = date_window
+		st.session_state.is_playing = False  # Auto-pause if the window changes
 
-#Loading Data
-if selected_category in ["Account Summary", "Tax Details", "NonTax Details", "NonDebt Details", "Subsidy Details", "Financing Details"]:
-	df, cat_order_list = loaddata()
-	df["Description"] = [x.strip() for x in df["Description"]]
-	# Convert 'Date' column to datetime if not already done
-	df['Date'] = pd.to_datetime(df['Date'], format='%d/%m/%y').apply(lambda x : x.date())
-	# Convert 'Description' to a categorical type for sorting
-	df['Description'] = pd.Categorical(df['Description'], categories=cat_order_list, ordered=True)
-	# Sort the DataFrame by 'Date' (newest first) and 'Description'
-	df = df.sort_values(by=['Date', 'Description'], ascending=[True, False])
+# Dates of the time scale within the window, from the view's precomputed calendar
+date_span = view.calendar.span(selected_animation, *date_window)
+unique_dates = view.calendar.dates[selected_animation][date_span]
+if not unique_dates:
+	st.info(f"No {selected_animation} dates between {date_window[0]:%b %Y} and {date_window[1]:%b %Y}; widen the window.")
+	st.stop()
 
-#Loading Data
-if selected_category in ["Expenditure Details"]:
-	df = loadfileexp()
-	 # Ensure that the 'current_index' does not exceed the number of unique dates in the new dataset
-	unique_dates = df['Date'].unique()
-	if st.session_state.current_index >= len(unique_dates):
-		st.session_state.current_index = len(unique_dates) - 1  # Adjust to the last valid index
-
-	# Dropdown for user to choose between 'Revenue' and 'Capital'
-	with st.sidebar:
-		selected_type = st.selectbox('Select Type:', ['All','Revenue', 'Capital'], key = 'type_select', index =0)
-		if st.session_state.selected_type != selected_type:
-			st.session_state.selected_type = selected_type
-			st.session_state.is_playing = False  # Auto-pause if category changes
-
-	# Numeric input for user to specify how many top items to display
-	top_n = st.sidebar.number_input('Number of Top Items:', min_value=1, max_value=25, value=15)
-	df = sort_and_filter_dataframe(df, selected_type, top_n)
-
-#Processing Loaded Data
-if selected_category in ["Account Summary", "NonTax Details", "NonDebt Details", "Expenditure Details", "Subsidy Details", "Financing Details"]:
-	df["Actual % of BE"] = ((df["Actual"].astype(float)/df["BE"].astype(float))*100).round(2)
-	df["Actual"] = (df["Actual"].astype(float)/100000).round(2) #converting into Rs Lakh Cr
-	df["BE"] = (df["BE"].astype(float)/100000).round(2) #converting into Rs Lakh Cr
-	df["GDP_Current"] = (df["GDP_Current"].astype(float)/100000).round(2) #converting into Rs Lakh Cr
-	df["Actual % of GDP"] = ((df["Actual"].astype(float)/df["GDP_Current"].astype(float))*100).round(2)
-	df["BE % of GDP"] = ((df["BE"].astype(float)/df["GDP_Current"].astype(float))*100).round(2)
-	fig2_xaxis_min_value = df['Actual % of GDP'].min()
-	fig2_xaxis_max_value = df['Actual % of GDP'].max()
-	fig1_xaxis_min_value = df['BE'].min()
-	fig1_xaxis_max_value = df['BE'].max()
-	xaxis1_title = 'Absolute Values Rs Lakh Cr (Top Bar - Actuals, Bottom Bar - BE)'
-	xaxis2_title ='Values % of GDP'
-
-if selected_category == "Tax Details":
-	df["Tax Cum Value"] = (df["Month_Cum_Year_CY"].astype(float)/100000).round(2) #converting into Rs Lakh Cr
-	df["Tax Cum Value % of GDP"] = ((df["Month_Cum_Year_CY"].astype(float)/df["GDP_Current"].astype(float))*100).round(2)
-	fig2_xaxis_min_value = df['Tax Cum Value % of GDP'].min()
-	fig2_xaxis_max_value = df['Tax Cum Value % of GDP'].max()
-	fig1_xaxis_min_value = df["Tax Cum Value"].min()
-	fig1_xaxis_max_value = df["Tax Cum Value"].max()
-	xaxis1_title = 'Tax Cum Value Rs Lakh Cr'
-	xaxis2_title = 'Tax Cum Value % of GDP'
-
-
-# Unique dates sorted
-unique_dates = df['Date'].unique()
-date_index = range(len(unique_dates))
-
-# After loading data and extracting unique_dates
-if selected_animation == "YearEnd":
-	unique_dates = [date for date in unique_dates if date.month == 3 and date.day == 31]
-	# Ensure that the 'current_index' does not exceed the number of unique dates in the new dataset
-	if st.session_state.current_index >= len(unique_dates):
-		st.session_state.current_index = len(unique_dates) - 1  # Adjust to the last valid index
+# Ensure that the 'current_index' does not exceed the number of unique dates in the new dataset
+if st.session_state.current_index >= len(unique_dates):
+	st.session_state.current_index = len(unique_dates) - 1  # Adjust to the last valid index
 
 
 title_placeholder = st.empty()
@@ -434,58 +251,13 @@ slider_placeholder = st.sidebar.empty()
 plot_placeholder = st.empty()
 
 
-def get_unique_colors(n):
-	# Generate colors using HSV transformed to RGB
-	hues = [x/n for x in range(n)]  # Generate n distinct hues
-	colors = [colorsys.hsv_to_rgb(h, 1, 1) for h in hues]  # Convert HSV to RGB
-	# Convert RGB from 0-1 to 0-255 scale and format as hex
-	hex_colors = ['#%02x%02x%02x' % (int(r*255), int(g*255), int(b*255)) for r, g, b in colors]
-	return hex_colors
-
-def get_color_map(descriptions):
-	unique_descriptions = list(set(descriptions))
-	num_descriptions = len(unique_descriptions)
-	colors = get_unique_colors(num_descriptions)
-	return dict(zip(unique_descriptions, colors))
-
-def get_financial_year(date):
-	year = date.year
-	if date.month < 4:
-		year -= 1
-	return f'FY{year % 100:02d}-{(year + 1) % 100:02d}'
-
-
 def update_title(selected_date, selected_category):
-	# Convert the selected_date to a datetime object if it isn't one already
-	if isinstance(selected_date, str):
-		selected_date = datetime.strptime(selected_date, '%Y-%m-%d').date()
-	
-	# Get the financial year string
-	fy = get_financial_year(selected_date)
-	
-	# Format the date correctly with ordinal suffix
-	day_suffix = lambda n: 'th' if 11 <= n <= 13 else {1: 'st', 2: 'nd', 3: 'rd'}.get(n % 10, 'th')
-	formatted_date = selected_date.strftime(f'%b {selected_date.day}{day_suffix(selected_date.day)}, %Y')
-
-	if selected_category == "Expenditure Details":
-		# Prepare the title with financial year, formatted date, and total values
-		total_be = df[df['Date'] == selected_date]['BE'].sum().round(2)
-		total_actual = df[df['Date'] == selected_date]['Actual'].sum().round(2)
-		title = f"Central Govt's Expenditure Details For <span style='color:blue;'>{fy}</span> - <span style='color:red;'>{formatted_date}</span> - Total BE: Rs <span style='color:green;'>{total_be} Lakh Cr</span>, Total Actual: Rs <span style='color:orange;'>{total_actual} Lakh Cr</span>"
-	else:
-		# Prepare the title with financial year and formatted date for other categories
-		if selected_category == "Account Summary":
-			title = f"Central Govt's Account Summary For <span style='color:blue;'>{fy}</span> - <span style='color:red;'>{formatted_date}</span>"
-		elif selected_category == "Tax Details":
-			title = f"Central Govt's Tax Collection Details <span style='color:blue;'>{fy}</span> - <span style='color:red;'>{formatted_date}</span>"
-		elif selected_category == "NonTax Details":
-			title = f"Central Govt's Non Tax Collection Details <span style='color:blue;'>{fy}</span> - <span style='color:red;'>{formatted_date}</span>"
-		elif selected_category == "NonDebt Details":
-			title = f"Central Govt's Non Debt Collection Details <span style='color:blue;'>{fy}</span> - <span style='color:red;'>{formatted_date}</span>"
-		elif selected_category == "Financing Details":
-			title = f"Central Govt's Deficit Financing Details <span style='color:blue;'>{fy}</span> - <span style='color:red;'>{formatted_date}</span>"
-		elif selected_category == "Subsidy Details":
-			title = f"Central Govt's Subsidy Details <span style='color:blue;'>{fy}</span> - <span style='color:red;'>{formatted_date}</span>"
+	# In Browser playback the figure carries its own per-frame title
+	if selected_playback == "Browser":
+		title_placeholder.empty()
+		return
+
+	title = get_title(selected_date, selected_category, totals_by_date)
 
 	# Use additional CSS to ensure the title is positioned correctly and reduced in size
 	title_css = """
@@ -505,176 +277,75 @@ def update_title(selected_date, selected_category):
 	title_placeholder.markdown(f"<h1>{title}</h1>", unsafe_allow_html=True)
 
 
-def update_plot(selected_date, selected_category):
-	filtered_data = df[df['Date'] == selected_date]
-	
-	color_map = get_color_map(filtered_data['Description'].unique())
-
-	fig = make_subplots(rows=1, cols=2, shared_yaxes=True, specs=[[{"type": "bar"}, {"type": "bar"}]], column_widths=[0.7, 0.3], horizontal_spacing=0.01)
-
-	if selected_category in ["Account Summary", "NonTax Details", "NonDebt Details", "Expenditure Details", "Subsidy Details", "Financing Details"]:
-
-		 # Add bar charts on the right 1
-		fig.add_trace(go.Bar(
-			x=filtered_data['BE'], 
-			y=filtered_data['Description'], 
-			orientation='h', 
-			name='Budget Estimate Rs Lakh Cr',
-			marker=dict(
-				color=[color_map[desc] for desc in filtered_data['Description']],
-				line=dict(color='black', width=1)  # Thin black border
-			),
-			text=filtered_data['BE'].round(2).astype(str), 
-			textfont=dict(size=15, family='Arial', color='black', weight='bold'), 
-			textposition='outside'  # Position text 
-		), row=1, col=1)
-
-		 # Add bar charts on the right 2
-		fig.add_trace(go.Bar(
-			x=filtered_data['Actual'], 
-			y=filtered_data['Description'], 
-			orientation='h', 
-			name='Actual Spend Rs Lakh Cr',
-			marker=dict(
-				color=[color_map[desc] for desc in filtered_data['Description']],opacity=0.5,
-				line=dict(color='black', width=1)  # Thin black border
-			),
-			text=filtered_data['Actual'].round(2).astype(str), 
-			textfont=dict(size=15, family='Arial', color='black', weight='bold'), 
-			# marker=dict(color='red', opacity=0.6),
-			textposition='outside'  # Position text 
-		), row=1, col=1)
-
-		# Add bar charts on the left 1
-		fig.add_trace(go.Bar(
-			x=filtered_data['BE % of GDP'], 
-			y=filtered_data['Description'], 
-			orientation='h', 
-			name='Budget Estimate % of GDP',
-			marker=dict(
-				color=[color_map[desc] for desc in filtered_data['Description']],
-				line=dict(color='black', width=1)  # Thin black border
-			),  # Apply dynamic color map
-			text=filtered_data['BE % of GDP'].round(2).astype(str)+"%", 
-			textfont=dict(size=15, family='Arial', color='black', weight='bold'), 
-			textposition='outside'  # Position text 
-		), row=1, col=2)
-
-		# Add bar charts on the left 2
-		fig.add_trace(go.Bar(
-			x=filtered_data['Actual % of GDP'], 
-			y=filtered_data['Description'], 
-			orientation='h', 
-			name='Actual Spend % of GDP',
-			marker=dict(
-				color=[color_map[desc] for desc in filtered_data['Description']],opacity=0.5,
-				line=dict(color='black', width=1)  # Thin black border
-			),
-			text=filtered_data['Actual % of GDP'].round(2).astype(str) + "%", 
-			textfont=dict(size=15, family='Arial', color='black', weight='bold'),
-			# marker=dict(color='red', opacity=0.6),
-			textposition='outside'  # Position text 
-		), row=1, col=2)
-
-
-	if selected_category == "Tax Details":
-
-		# Add bar charts on the right 1
-		fig.add_trace(go.Bar(
-			x=filtered_data['Tax Cum Value'], 
-			y=filtered_data['Description'], 
-			orientation='h', 
-			name='Tax Cumulative Value Rs Lakh Cr',
-			marker=dict(
-				color=[color_map[desc] for desc in filtered_data['Description']],
-				line=dict(color='black', width=1)  # Thin black border
-			),
-			text=filtered_data['Tax Cum Value'].round(2).astype(str), 
-			textfont=dict(size=15, family='Arial', color='black', weight='bold'), 
-			textposition='outside'  # Position text 
-		), row=1, col=1)
-
-		# Add bar charts on the left 1
-		fig.add_trace(go.Bar(
-			x=filtered_data['Tax Cum Value % of GDP'], 
-			y=filtered_data['Description'], 
-			orientation='h', 
-			name='Tax Cum Value % of GDP',
-			marker=dict(
-				color=[color_map[desc] for desc in filtered_data['Description']],
-				line=dict(color='black', width=1)  # Thin black border
-			),  # Apply dynamic color map
-			text=filtered_data['Tax Cum Value % of GDP'].round(2).astype(str)+"%", 
-			textfont=dict(size=15, family='Arial', color='black', weight='bold'), 
-			textposition='outside'  # Position text 
-		), row=1, col=2)
-
-	
-	# Update the layout for the combined figure for 1
-	fig.update_xaxes(row=1, col=2, range=[0, fig2_xaxis_max_value * 1.2], fixedrange=True, showline=True, linewidth=1.5, linecolor='grey', mirror=True, showgrid=True, gridcolor='lightgrey')
-	fig.update_yaxes(row=1, col=2, tickfont=dict(size=15),fixedrange=True, showline=True, linewidth=1.5, linecolor='grey', mirror=True, showgrid=True, gridcolor='lightgrey')
-
-	# Update the layout for the combined figure for 2
-	fig.update_xaxes(row=1, col=1, range=[0, fig1_xaxis_max_value * 1.2], fixedrange=True, showline=True, linewidth=1.5, linecolor='grey', mirror=True, showgrid=True, gridcolor='lightgrey')
-	fig.update_yaxes(row=1, col=1, tickfont=dict(size=15),fixedrange=True, showline=True, linewidth=1.5, linecolor='grey', mirror=True, showgrid=True, gridcolor='lightgrey')
-
-	# Update y-axes: remove y-axis labels from the first chart (left)
-	fig.update_yaxes(tickfont=dict(size=15, family='Arial', color='black', weight='bold'), row=1, col=1)
-
-	# Update layout for axis properties to remove y-axis title and reclaim space
-	fig.update_layout(
-		# title=f'Financial Data Comparison for {selected_date}',
-		# title_font=dict(size=15, family='Arial', color='black', weight='bold'),
-		plot_bgcolor="white",  # Ensures background doesn't add unexpected styles
-		paper_bgcolor="white",
-		xaxis1_title= xaxis1_title,
-		xaxis2_title= xaxis2_title,
-		xaxis1_title_font=dict(size=15, family='Arial', color='black', weight='bold'),
-		xaxis2_title_font=dict(size=15, family='Arial', color='black', weight='bold'),
-		showlegend=False,
-		height=700, width=1200, margin=dict(l=0, r=10, t=0, b=0, pad=0),
-		yaxis=dict(
-			title='',  # No title
-			showticklabels=True,  # Keep tick labels
-			automargin=True  # Automatically adjust margin to tick labels
-		),
-	)
+# Plotly frames for every date of a time scale, built once and shared by all
+# sessions using Browser playback; a date window is a slice of them
+@st.cache_resource(max_entries=16)
+def loadanimationframes(dataset_key, data_version, selected_animation, compare_yoy, _view, _template):
+	selected_category = dataset_key[0]
+	dates = _view.calendar.dates[selected_animation]
+	frames = [_view.frames_by_date[date] for date in dates]
+	labels = [f"{get_financial_year(date)} - {date.strftime('%d %b %Y')}" for date in dates]
+	titles = [get_title(date, selected_category, _view.totals_by_date) for date in dates]
+	return build_animation_frames(_template, selected_category, frames, labels, titles, _view.palette, compare_yoy)
 
 
-	update_title(selected_date, selected_category)
+def render_figure(selected_date, selected_category):
+	if selected_playback == "Browser":
+		animation_frames = loadanimationframes(dataset_key, data_version, selected_animation, compare_yoy, view, figure_template)[date_span]
+		return build_animated_figure(figure_template, animation_frames, unique_dates.index(selected_date), int(animation_delay * 1000))
 
-	plot_placeholder.plotly_chart(fig, use_container_width=True) #End of function update plot
+	return fill_figure(figure_template, selected_category, frames_by_date[selected_date], palette, compare_yoy)
 
-#Animation of plot part of the code
-# Setup columns for buttons
-col1, col2 = st.columns(2)
-with col1:
-	prev_button = st.button('Previous')
-with col2:
-	next_button = st.button('Next')
 
-# Handle previous and next button functionality
-if prev_button:
+def update_plot(selected_date, selected_category):
+	with run_timer.stage("figure"):
+		if selected_playback == "Browser":
+			# Assembled from the cached frames, which costs no more than
+			# decoding a cached copy of the whole animated figure would
+			fig = render_figure(selected_date, selected_category)
+		else:
+			figure_key = (dataset_key, selected_date, compare_yoy, data_version)
+			fig = figure_cache.get(figure_key)
+			if fig is None:
+				fig = render_figure(selected_date, selected_category)
+				figure_cache.put(figure_key, fig)
+
+	# Serialising the figure and queueing it for the websocket
+	with run_timer.stage("plotly_chart"):
+		plot_placeholder.plotly_chart(fig, use_container_width=True) #End of function update plot
+
+# Render pipeline: each run resolves one date and draws its title and plot
+# once, then once more per frame while playing
+render_count = 0
+
+def render_frame(selected_date, selected_category):
+	global render_count
+	render_count += 1
+	with run_timer.stage("title"):
+		update_title(selected_date, selected_category)
+	update_plot(selected_date, selected_category)
+
+# Buttons and the slider only move current_index (through callbacks, which run
+# before the script), so the date is known before anything is drawn
+def previous_date():
 	if st.session_state.current_index > 0:
 		st.session_state.is_playing = False
 		st.session_state.current_index -= 1
-elif next_button:
-	if st.session_state.current_index < len(unique_dates) - 1:
+
+def next_date(num_dates):
+	if st.session_state.current_index < num_dates - 1:
 		st.session_state.current_index += 1
 
-slider = slider_placeholder.slider("Slider for Selecting Date Index", min_value=0, max_value=len(unique_dates) - 1, value=st.session_state.current_index, key="date_slider")
-selected_date = unique_dates[slider]
-update_plot(selected_date, selected_category)
-update_title(selected_date, selected_category)
+def slider_moved(slider_key):
+	st.session_state.current_index = st.session_state[slider_key]
 
-# Synchronize the current_index with the slider
-if slider != st.session_state.current_index:
-	st.session_state.current_index = slider
-	# Explicitly trigger updates
-	selected_date = unique_dates[slider]
-	update_plot(selected_date, selected_category)
-	update_title(selected_date, selected_category)
-	st.rerun()  # Optionally force a rerun if necessary
+#Animation of plot part of the code
+# Setup columns for buttons
+col1, col2 = st.columns(2)
+with col1:
+	st.button('Previous', on_click=previous_date)
+with col2:
+	st.button('Next', on_click=next_date, args=(len(unique_dates),))
 
 # Place the "Play" and "Pause" button at the top of the sidebar with unique keys
 play_button = st.sidebar.button("Play", key="play_button")
@@ -689,25 +360,46 @@ if play_button:
 
 if pause_button:
 	st.session_state.is_playing = False
-	update_plot(unique_dates[st.session_state.current_index],selected_category)
-	update_title(unique_dates[st.session_state.current_index],selected_category)
 
-# Slider updates should trigger the plot and title updates outside the loop
-# selected_date = unique_dates[slider]
-update_plot(selected_date, selected_category)
-update_title(selected_date, selected_category)
+# The slider follows current_index through its session state rather than a
+# changing value, which would make it a new widget and need a second rerun.
+# A window holding a single date has nothing to slide through.
+if len(unique_dates) > 1:
+	st.session_state.date_slider = st.session_state.current_index
+	slider_placeholder.slider("Slider for Selecting Date Index", min_value=0, max_value=len(unique_dates) - 1, key="date_slider", on_change=slider_moved, args=("date_slider",))
 
-# Animation loop controlled by the play button
-if st.session_state.get('is_playing', False):
+selected_date = unique_dates[st.session_state.current_index]
+render_frame(selected_date, selected_category)
+assert render_count == 1, f"rendered {render_count} times in one run"
+
+# Animation loop controlled by the play button; Browser playback animates client side
+if st.session_state.get('is_playing', False) and selected_playback == "Server":
 	start_index = st.session_state.current_index
-	for i in range(start_index, len(unique_dates)):
+	for i in range(start_index + 1, len(unique_dates)):
+		with run_timer.idle():
+			time.sleep(animation_delay)  # Adjust sleep time to control
 		if not st.session_state.is_playing:
 			break
 		selected_date = unique_dates[i]
-		update_plot(selected_date, selected_category)
-		update_title(selected_date, selected_category)
+		render_frame(selected_date, selected_category)
+		assert render_count == i - start_index + 1, f"rendered {render_count} times for {i - start_index + 1} frames"
 		st.session_state.current_index = i
-		slider_placeholder.slider("Slider for Selecting Date Index", min_value=0, max_value=len(unique_dates) - 1, value=i, key=f"date_slider_{i}")
-		time.sleep(animation_delay)  # Adjust sleep time to control
-
-
+		slider_placeholder.slider("Slider for Selecting Date Index", min_value=0, max_value=len(unique_dates) - 1, value=i, key=f"date_slider_{i}", on_change=slider_moved, args=(f"date_slider_{i}",))
+	else:
+		st.session_state.is_playing = False  # Auto-pause at the last date
+
+# One structured log line per run, to chart render latency over time
+run_record = run_timer.finish(event="rerun", category=selected_category, date=f"{selected_date:%Y-%m-%d}", playback=selected_playback, renders=render_count)
+logger.info(json.dumps(run_record))
+
+# Hidden diagnostics panel, opened by adding ?diagnostics=1 to the URL
+if st.query_params.get("diagnostics") == "1":
+	with st.sidebar.expander("Diagnostics", expanded=True):
+		st.caption("Stage latency, this session")
+		st.dataframe(pd.DataFrame(st.session_state.stage_timings.summary()).T)
+		st.caption("Stage latency, all sessions in this process")
+		st.dataframe(pd.DataFrame(loadprocesstimings().summary()).T)
+		st.caption("Figure cache")
+		st.json(figure_cache.stats())
+		st.caption("Server warm-up" + (" (running)" if warm_up_datasets().is_alive() else ""))
+		st.dataframe(pd.DataFrame(warm_up_datasets().timings))
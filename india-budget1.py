@@ -1,15 +1,13 @@
+import time
+
 import pandas as pd
-from datetime import datetime
-import plotly.express as px
-from plotly.subplots import make_subplots
-import plotly.graph_objects as go
 import streamlit as st
-import io
-import msoffcrypto
-import numpy as np
-import re
-import time
-import colorsys
+
+from india_accounts.dataset import DataStore, DatasetView
+from india_accounts.figures import build_figure_template, fill_figure
+from india_accounts.partition import TIME_SCALES
+from india_accounts.titles import get_title
+from india_accounts.transform import select_items
 
 pd.set_option('future.no_silent_downcasting', True)
 pd.set_option('display.max_columns', None)
@@ -62,142 +60,28 @@ st.markdown("""
     """, unsafe_allow_html=True)
 
 
-#List for defining sorting order for "Account Summary" & "Tax Details"
-main_cat_order_list = [
-    "Revenue Receipts",
-    "Rev Recp - Tax Revenue Net",
-    "Rev Recp - Non Tax Revenue",
-    "Non Debt Capital Receipt",
-    "Non Debt - Recovery of Loans",
-    "Non Debt - Other Receipt",
-    "Total Recp - RevRecp Plus NonDebtRecp",
-    "Revenue Expenditure",
-    "Rev Exp - Interest Payments",
-    "Capital Expenditure",
-    "Cap Exp - Loan Disbursed",
-    "Total Exp - RevExp + CapExp",
-    "Fiscal Deficit - TotalExp Minus TotalRecp",
-    "Revenue Deficit - RevExp Minus RevRecp",
-    "Primary Deficit - FisicalDef Minus InterestPay"
-]
-
-tax_order_list = [
-    "Gross Tax Revenue",
-    "Corporation Tax",
-    "Income Tax",
-    "Goods & Service Tax",
-    "UT GST",
-    "Customs",
-    "Union Excise Duties",
-    "Service Tax",
-    "Other Taxes",
-    "NCCD to NDRF",
-    "Assignment to States",
-    "GST Comp Cess",
-    "IGST"
-]
-
-nontax_order_list = [
-    "A.Interest Receipts",
-    "B.Dividend & Profits",
-    "C.NonTaxRev of UTs",
-    "D.Fiscal Services Net",
-    "D.General Services Net",
-    "D.Social Services",
-    "D.Economic Services Net",
-    "D.Grant in Aid",
-    "Total of D",
-    "Total NonTax Rev"
-]
-
-nondebt_order_list = [
-    "Gross Recoveries",
-    "Less Recoveries of Ways&Means Adv&Loans to Govt Emp",
-    "Less Expenditure Netted",
-    "Less Short Term Loans",
-    "Net Recoveries Loans",
-    "Net Issue of Bonus Share",
-    "Misc Cap Receipts",
-    "Misc-Other Receipts",
-    "Misc-Issue Bonds & Shares",
-    "Misc-Disinvestment Govt Equity",
-    "Misc-Monetization of Highways",
-    "Misc-Disinvestment Govt Equity in PSB & FIs",
-    "Misc-Listing Insurance Co",
-    "Total Non Debt Receipts"
-]
-
-
-
-# Load file function
-@st.cache_data
-def loadfilemain():
-    password = st.secrets["db_password"]
-    excel_content = io.BytesIO()
-    with open("T01_Main.xlsx", 'rb') as f:
-        excel = msoffcrypto.OfficeFile(f)
-        excel.load_key(password)
-        excel.decrypt(excel_content)
-    
-    # Loading data from excel file
-    df = pd.read_excel(excel_content, sheet_name="Sheet1")
-    return df
-
-# Load file function
-@st.cache_data
-def loadfiletax():
-    password = st.secrets["db_password"]
-    excel_content = io.BytesIO()
-    with open("T02_TAX_Details.xlsx", 'rb') as f:
-        excel = msoffcrypto.OfficeFile(f)
-        excel.load_key(password)
-        excel.decrypt(excel_content)
-    
-    # Loading data from excel file
-    df = pd.read_excel(excel_content, sheet_name="Sheet1")
-    return df
-
-# Load file function
-@st.cache_data
-def loadfilenontax():
-    password = st.secrets["db_password"]
-    excel_content = io.BytesIO()
-    with open("T03_NonTAX_Details.xlsx", 'rb') as f:
-        excel = msoffcrypto.OfficeFile(f)
-        excel.load_key(password)
-        excel.decrypt(excel_content)
-    
-    # Loading data from excel file
-    df = pd.read_excel(excel_content, sheet_name="Sheet1")
-    return df
-
-# Load file function
-@st.cache_data
-def loadfilenondebt():
-    password = st.secrets["db_password"]
-    excel_content = io.BytesIO()
-    with open("T04_NonDebt_Details.xlsx", 'rb') as f:
-        excel = msoffcrypto.OfficeFile(f)
-        excel.load_key(password)
-        excel.decrypt(excel_content)
-    
-    # Loading data from excel file
-    df = pd.read_excel(excel_content, sheet_name="Sheet1")
-    return df
-
- #Load file function
-@st.cache_data
-def loadfileexp():
-    password = st.secrets["db_password"]
-    excel_content = io.BytesIO()
-    with open("T12_Expenditure.xlsx", 'rb') as f:
-        excel = msoffcrypto.OfficeFile(f)
-        excel.load_key(password)
-        excel.decrypt(excel_content)
-    
-    # Loading data from excel file
-    df = pd.read_excel(excel_content, sheet_name="Sheet1")
-    return df
+
+# Data and figures come from the india_accounts package; this script only lays
+# out the widgets and drives the animation
+
+# Current dataset of every category, loaded once per process and shared by all sessions
+@st.cache_resource
+def loaddatastore():
+    return DataStore(st.secrets["db_password"])
+
+# Chart-ready rows of hand-picked Expenditure line items; every selection is
+# a new entry, so only the most recent are kept
+@st.cache_resource(max_entries=16)
+def loaditemsview(data_version, selected_items, _dataset):
+    return DatasetView(*select_items(_dataset.ranking.df, list(selected_items)))
+
+# Styled figure skeleton; each date only swaps in the bar data
+@st.cache_resource(max_entries=32)
+def loadfiguretemplate(dataset_key, data_version, _axes):
+    return build_figure_template(dataset_key[0], _axes)
+
+def pause():
+    st.session_state.is_playing = False
 
 # Main Program Starts Here
 
@@ -208,260 +92,70 @@ if 'current_index' not in st.session_state:
 if 'is_playing' not in st.session_state:
     st.session_state.is_playing = False
 
-if 'selected_category' not in st.session_state:
-    st.session_state.selected_category = "Account Summary"
-
-if 'selected_animation' not in st.session_state:
-    st.session_state.selected_animation = "MonthEnd"
-
-if 'selection_type' not in st.session_state: #(New Code)
-    st.session_state.selection_type = "No of Top Items"
-
-if 'selected_item' not in st.session_state: #(New Code)
-    st.session_state.selected_item = None
-
-if 'selected_speed' not in st.session_state: #(New Code)
-    st.session_state.selected_speed = "Medium"
-
 # Sidebar for category selection
 with st.sidebar:
-    selected_category = st.selectbox("Select Category", ["Account Summary", "Tax Details", "NonTax Details", "NonDebt Details", "Expenditure Details"], key='selected_category',index=0 )
-    # Check if category has changed
-    if st.session_state.selected_category != selected_category:
-        st.session_state.selected_category = selected_category
-        if selected_category == "Expenditure Details":
-            selection_type = st.session_state.selection_type 
-            selection_type = st.sidebar.selectbox(
-                "Choose Selection Type:",
-                ["Number of Top Items", "Select Individual Items"],
-                key='selection_type', index=0 
-            )
-            # Check if category has changed
-            if st.session_state.selection_type != selection_type:
-                st.session_state.selection_type = selection_type
-                st.session_state.is_playing = False  # Auto-pause if category changes
-        st.session_state.is_playing = False  # Auto-pause if category changes
-
-# In the sidebar, under 'Expenditure Details' category selection #(New Code)
-# if selected_category == "Expenditure Details":
-#     selection_type = st.sidebar.selectbox(
-#         "Choose Selection Type:",
-#         ["Number of Top Items", "Select Individual Items"],
-#         key='selection_type', index=0 
-#     )
-#     # Check if category has changed
-#     if st.session_state.selection_type != selection_type:
-#         st.session_state.selection_type = selection_type
-#         st.session_state.is_playing = False  # Auto-pause if category changes
+    selected_category = st.selectbox("Select Category", ["Account Summary", "Tax Details", "NonTax Details", "NonDebt Details", "Expenditure Details"], key='selected_category', index=0, on_change=pause)
 
 # Animation basis selection dropdown
 with st.sidebar:
     selected_animation = st.sidebar.selectbox(
-        "Select Animation Time Scale (Month/Year)",
-        ["MonthEnd", "YearEnd"], key='selected_animation',
-        index=0  # Default to 'MonthEnd'
+        "Select Animation Time Scale (Month/Quarter/Year)",
+        TIME_SCALES, key='selected_animation',
+        index=0,  # Default to 'MonthEnd'
+        on_change=pause
     )
-    if st.session_state.selected_animation != selected_animation:
-        st.session_state.selected_animation = selected_animation
-        st.session_state.is_playing = False  # Auto-pause if category changes
-
-def loaddata():
-    if selected_category == "Account Summary":
-        df = loadfilemain()
-        cat_order_list = main_cat_order_list
-    if selected_category == "Tax Details":
-        df = loadfiletax()
-        cat_order_list = tax_order_list
-    if selected_category == "NonTax Details":
-        df = loadfilenontax()
-        cat_order_list = nontax_order_list
-    if selected_category == "NonDebt Details":
-        df = loadfilenondebt()
-        cat_order_list = nondebt_order_list
-
-    # Ensure that the 'current_index' does not exceed the number of unique dates in the new dataset
-    unique_dates = df['Date'].unique()
-    if st.session_state.current_index >= len(unique_dates):
-        st.session_state.current_index = len(unique_dates) - 1  # Adjust to the last valid index
-
-    return df, cat_order_list
-
-def sort_and_filter_dataframe(df, category, top_n):
-    # Convert 'Date' to datetime
-    df['Date'] = pd.to_datetime(df['Date'], format='%d/%m/%y')
-
-    if category !='All':
-        # Filter based on the category selected by the user
-        df = df[df['Description'].str.contains(category)]
-
-    # Identify the latest date
-    latest_date = df['Date'].max()
-
-    # Get the ordering for the latest date based on 'BE' values for the selected category
-    top_descriptions = df[df['Date'] == latest_date].sort_values(by='BE', ascending=False)['Description'].head(top_n).tolist()
-
-    # Filter the DataFrame to keep only rows with descriptions in the top 15 list
-    df = df[df['Description'].isin(top_descriptions)]
-
-    # Define categorical type with top descriptions only
-    all_descriptions = pd.CategoricalDtype(categories=top_descriptions, ordered=True)
-    df['Description'] = df['Description'].astype(all_descriptions)
-
-    # Sort DataFrame by 'Date' and ordered 'Description'
-    df_sorted = df.sort_values(by=['Date', 'Description'],ascending=[True, False])
-
-    return df_sorted
-
 
 #Loading Data
-if selected_category in ["Account Summary", "Tax Details", "NonTax Details", "NonDebt Details"]:
-    df, cat_order_list = loaddata()
-    df["Description"] = [x.strip() for x in df["Description"]]
-    # Convert 'Date' column to datetime if not already done
-    df['Date'] = pd.to_datetime(df['Date'], format='%d/%m/%y').apply(lambda x : x.date())
-    # Convert 'Description' to a categorical type for sorting
-    df['Description'] = pd.Categorical(df['Description'], categories=cat_order_list, ordered=True)
-    # Sort the DataFrame by 'Date' (newest first) and 'Description'
-    df = df.sort_values(by=['Date', 'Description'], ascending=[True, False])
+dataset = loaddatastore().get(selected_category)
+
+if selected_category == "Expenditure Details":
+    selection_type = st.sidebar.selectbox(
+        "Choose Selection Type:",
+        ["Number of Top Items", "Select Individual Items"],
+        key='selection_type', index=0, on_change=pause
+    )
 
-#Loading Data
-if selected_category in ["Expenditure Details"]:
-    df = loadfileexp()
-     # Ensure that the 'current_index' does not exceed the number of unique dates in the new dataset
-    unique_dates = df['Date'].unique()
-    if st.session_state.current_index >= len(unique_dates):
-        st.session_state.current_index = len(unique_dates) - 1  # Adjust to the last valid index
-
-    #Conditional New Code
     if selection_type == "Number of Top Items":
         # Dropdown for user to choose between 'Revenue' and 'Capital'
-        category_choice = st.sidebar.selectbox('Select Category:', ['All','Revenue', 'Capital'])
+        category_choice = st.sidebar.selectbox('Select Category:', ['All', 'Revenue', 'Capital'], on_change=pause)
         # Numeric input for user to specify how many top items to display
-        top_n = st.sidebar.number_input('Number of Top Items:', min_value=1, max_value=25, value=15)
-        df = sort_and_filter_dataframe(df, category_choice, top_n)
-    
-    elif selection_type == "Select Individual Items":
-
-        # Sort and filter the dataframe to get the top 15 items
-        top_items_df = sort_and_filter_dataframe(df, "All", 15)
-        
-        # Get the top 15 items' descriptions as default items for the multiselect
-        default_items = top_items_df["Description"].unique().tolist()
-        
-        # Get all unique descriptions for the multiselect options
-        all_items = sorted(df['Description'].unique().tolist())
-        
-        # Create a multiselect with default items selected
-        selected_items = st.sidebar.multiselect('Select Items:', all_items, default=default_items, key = 'selected_items')
-        
-        # Check if category has changed
-        if st.session_state.selected_items != selected_items:
-            st.session_state.selected_items = selected_items
-            st.session_state.is_playing = False  # Auto-pause if category changes
-            # Initially filter the DataFrame with default items for first render
-            df = df[df['Description'].isin(default_items)]
-            # Now, sort the DataFrame by 'Date' and 'BE' in descending order
-            df = df.sort_values(by=['Date', 'BE'], ascending=[True, True])
-
-        # Update the DataFrame based on user's current selection
-        # This line is critical as it ensures any user changes to selection are captured and used to filter the DataFrame
-        df = df[df['Description'].isin(selected_items)]
-        # Now, sort the DataFrame by 'Date' and 'BE' in descending order
-        df = df.sort_values(by=['Date', 'BE'], ascending=[True, True])
-
-#Processing Loaded Data
-if selected_category in ["Account Summary", "NonTax Details", "NonDebt Details", "Expenditure Details"]:
-    df["Actual % of BE"] = ((df["Actual"].astype(float)/df["BE"].astype(float))*100).round(2)
-    df["Actual"] = (df["Actual"].astype(float)/100000).round(2) #converting into Rs Lakh Cr
-    df["BE"] = (df["BE"].astype(float)/100000).round(2) #converting into Rs Lakh Cr
-    df["GDP_Current"] = (df["GDP_Current"].astype(float)/100000).round(2) #converting into Rs Lakh Cr
-    df["Actual % of GDP"] = ((df["Actual"].astype(float)/df["GDP_Current"].astype(float))*100).round(2)
-    df["BE % of GDP"] = ((df["BE"].astype(float)/df["GDP_Current"].astype(float))*100).round(2)
-    fig2_xaxis_min_value = df['Actual % of GDP'].min()
-    fig2_xaxis_max_value = df['Actual % of GDP'].max()
-    fig1_xaxis_min_value = df['BE'].min()
-    fig1_xaxis_max_value = df['BE'].max()
-    xaxis1_title = 'Absolute Values Rs Lakh Cr (Top Bar - Actuals, Bottom Bar - BE)'
-    xaxis2_title ='Values % of GDP'
-
-if selected_category == "Tax Details":
-    df["Tax Cum Value"] = (df["Month_Cum_Year_CY"].astype(float)/100000).round(2) #converting into Rs Lakh Cr
-    df["Tax Cum Value % of GDP"] = ((df["Month_Cum_Year_CY"].astype(float)/df["GDP_Current"].astype(float))*100).round(2)
-    fig2_xaxis_min_value = df['Tax Cum Value % of GDP'].min()
-    fig2_xaxis_max_value = df['Tax Cum Value % of GDP'].max()
-    fig1_xaxis_min_value = df["Tax Cum Value"].min()
-    fig1_xaxis_max_value = df["Tax Cum Value"].max()
-    xaxis1_title = 'Tax Cum Value Rs Lakh Cr'
-    xaxis2_title = 'Tax Cum Value % of GDP'
-
-
-# Unique dates sorted
-unique_dates = df['Date'].unique()
-date_index = range(len(unique_dates))
-
-# After loading data and extracting unique_dates
-if selected_animation == "YearEnd":
-    unique_dates = [date for date in unique_dates if date.month == 3 and date.day == 31]
-    # Ensure that the 'current_index' does not exceed the number of unique dates in the new dataset
-    if st.session_state.current_index >= len(unique_dates):
-        st.session_state.current_index = len(unique_dates) - 1  # Adjust to the last valid index
+        max_items = min(25, dataset.item_count(category_choice))
+        top_n = st.sidebar.number_input('Number of Top Items:', min_value=1, max_value=max_items, value=min(15, max_items), on_change=pause)
+        dataset_key = (selected_category, category_choice, top_n)
+        view = dataset.view(category_choice, top_n)
 
+    else:
+        # The top 15 items are selected to start with
+        default_items = dataset.ranking.rankings['All'][:15]
+        all_items = sorted(dataset.ranking.df['Description'].unique().tolist())
+        selected_items = st.sidebar.multiselect('Select Items:', all_items, default=default_items, key='selected_items', on_change=pause)
+        if not selected_items:
+            st.info("Select at least one item to plot.")
+            st.stop()
+        dataset_key = (selected_category, tuple(selected_items))
+        view = loaditemsview(dataset.version, tuple(selected_items), dataset)
 
-title_placeholder = st.empty()
-slider_placeholder = st.sidebar.empty()
-plot_placeholder = st.empty()
+else:
+    dataset_key = (selected_category,)
+    view = dataset.view()
 
+figure_template = loadfiguretemplate(dataset_key, dataset.version, view.axes)
 
-def get_unique_colors(n):
-    # Generate colors using HSV transformed to RGB
-    hues = [x/n for x in range(n)]  # Generate n distinct hues
-    colors = [colorsys.hsv_to_rgb(h, 1, 1) for h in hues]  # Convert HSV to RGB
-    # Convert RGB from 0-1 to 0-255 scale and format as hex
-    hex_colors = ['#%02x%02x%02x' % (int(r*255), int(g*255), int(b*255)) for r, g, b in colors]
-    return hex_colors
+# Dates of the time scale, from the view's precomputed calendar
+unique_dates = view.calendar.dates[selected_animation]
 
-def get_color_map(descriptions):
-    unique_descriptions = list(set(descriptions))
-    num_descriptions = len(unique_descriptions)
-    colors = get_unique_colors(num_descriptions)
-    return dict(zip(unique_descriptions, colors))
+# Ensure that the 'current_index' does not exceed the number of unique dates in the new dataset
+if st.session_state.current_index >= len(unique_dates):
+    st.session_state.current_index = len(unique_dates) - 1  # Adjust to the last valid index
 
-def get_financial_year(date):
-    year = date.year
-    if date.month < 4:
-        year -= 1
-    return f'FY{year % 100:02d}-{(year + 1) % 100:02d}'
 
+title_placeholder = st.empty()
+slider_placeholder = st.sidebar.empty()
+plot_placeholder = st.empty()
 
 
 def update_title(selected_date, selected_category):
-    # Convert the selected_date to a datetime object if it isn't one already
-    if isinstance(selected_date, str):
-        selected_date = datetime.strptime(selected_date, '%Y-%m-%d').date()
-    
-    # Get the financial year string
-    fy = get_financial_year(selected_date)
-    
-    # Format the date correctly with ordinal suffix
-    day_suffix = lambda n: 'th' if 11 <= n <= 13 else {1: 'st', 2: 'nd', 3: 'rd'}.get(n % 10, 'th')
-    formatted_date = selected_date.strftime(f'%b {selected_date.day}{day_suffix(selected_date.day)}, %Y')
-
-    if selected_category == "Expenditure Details":
-        # Prepare the title with financial year, formatted date, and total values
-        total_be = df[df['Date'] == selected_date]['BE'].sum().round(2)
-        total_actual = df[df['Date'] == selected_date]['Actual'].sum().round(2)
-        title = f"Central Govt's Expenditure Details For <span style='color:blue;'>{fy}</span> - <span style='color:red;'>{formatted_date}</span> - Total BE: Rs <span style='color:green;'>{total_be} Lakh Cr</span>, Total Actual: Rs <span style='color:orange;'>{total_actual} Lakh Cr</span>"
-    else:
-        # Prepare the title with financial year and formatted date for other categories
-        if selected_category == "Account Summary":
-            title = f"Central Govt's Account Summary For <span style='color:blue;'>{fy}</span> - <span style='color:red;'>{formatted_date}</span>"
-        elif selected_category == "Tax Details":
-            title = f"Central Govt's Tax Collection Details <span style='color:blue;'>{fy}</span> - <span style='color:red;'>{formatted_date}</span>"
-        elif selected_category == "NonTax Details":
-            title = f"Central Govt's Non Tax Collection Details <span style='color:blue;'>{fy}</span> - <span style='color:red;'>{formatted_date}</span>"
-        elif selected_category == "NonDebt Details":
-            title = f"Central Govt's Non Debt Collection Details <span style='color:blue;'>{fy}</span> - <span style='color:red;'>{formatted_date}</span>"
-
+    title = get_title(selected_date, selected_category, view.totals_by_date)
 
     # Use additional CSS to ensure the title is positioned correctly and reduced in size
     title_css = """
@@ -482,177 +176,33 @@ def update_title(selected_date, selected_category):
 
 
 def update_plot(selected_date, selected_category):
-    filtered_data = df[df['Date'] == selected_date]
-    
-    color_map = get_color_map(filtered_data['Description'].unique())
-
-    fig = make_subplots(rows=1, cols=2, shared_yaxes=True, specs=[[{"type": "bar"}, {"type": "bar"}]], column_widths=[0.7, 0.3], horizontal_spacing=0.01)
-
-    if selected_category in ["Account Summary", "NonTax Details", "NonDebt Details", "Expenditure Details"]:
-
-         # Add bar charts on the right 1
-        fig.add_trace(go.Bar(
-            x=filtered_data['BE'], 
-            y=filtered_data['Description'], 
-            orientation='h', 
-            name='Budget Estimate Rs Lakh Cr',
-            marker=dict(
-                color=[color_map[desc] for desc in filtered_data['Description']],
-                line=dict(color='black', width=1)  # Thin black border
-            ),
-            text=filtered_data['BE'].round(2).astype(str), 
-            textfont=dict(size=15, family='Arial', color='black', weight='bold'), 
-            textposition='outside'  # Position text 
-        ), row=1, col=1)
-
-         # Add bar charts on the right 2
-        fig.add_trace(go.Bar(
-            x=filtered_data['Actual'], 
-            y=filtered_data['Description'], 
-            orientation='h', 
-            name='Actual Spend Rs Lakh Cr',
-            marker=dict(
-                color=[color_map[desc] for desc in filtered_data['Description']],opacity=0.5,
-                line=dict(color='black', width=1)  # Thin black border
-            ),
-            text=filtered_data['Actual'].round(2).astype(str), 
-            textfont=dict(size=15, family='Arial', color='black', weight='bold'), 
-            # marker=dict(color='red', opacity=0.6),
-            textposition='outside'  # Position text 
-        ), row=1, col=1)
-
-        # Add bar charts on the left 1
-        fig.add_trace(go.Bar(
-            x=filtered_data['BE % of GDP'], 
-            y=filtered_data['Description'], 
-            orientation='h', 
-            name='Budget Estimate % of GDP',
-            marker=dict(
-                color=[color_map[desc] for desc in filtered_data['Description']],
-                line=dict(color='black', width=1)  # Thin black border
-            ),  # Apply dynamic color map
-            text=filtered_data['BE % of GDP'].round(2).astype(str)+"%", 
-            textfont=dict(size=15, family='Arial', color='black', weight='bold'), 
-            textposition='outside'  # Position text 
-        ), row=1, col=2)
-
-        # Add bar charts on the left 2
-        fig.add_trace(go.Bar(
-            x=filtered_data['Actual % of GDP'], 
-            y=filtered_data['Description'], 
-            orientation='h', 
-            name='Actual Spend % of GDP',
-            marker=dict(
-                color=[color_map[desc] for desc in filtered_data['Description']],opacity=0.5,
-                line=dict(color='black', width=1)  # Thin black border
-            ),
-            text=filtered_data['Actual % of GDP'].round(2).astype(str) + "%", 
-            textfont=dict(size=15, family='Arial', color='black', weight='bold'),
-            # marker=dict(color='red', opacity=0.6),
-            textposition='outside'  # Position text 
-        ), row=1, col=2)
-
-
-    if selected_category == "Tax Details":
-
-        # Add bar charts on the right 1
-        fig.add_trace(go.Bar(
-            x=filtered_data['Tax Cum Value'], 
-            y=filtered_data['Description'], 
-            orientation='h', 
-            name='Tax Cumulative Value Rs Lakh Cr',
-            marker=dict(
-                color=[color_map[desc] for desc in filtered_data['Description']],
-                line=dict(color='black', width=1)  # Thin black border
-            ),
-            text=filtered_data['Tax Cum Value'].round(2).astype(str), 
-            textfont=dict(size=15, family='Arial', color='black', weight='bold'), 
-            textposition='outside'  # Position text 
-        ), row=1, col=1)
-
-        # Add bar charts on the left 1
-        fig.add_trace(go.Bar(
-            x=filtered_data['Tax Cum Value % of GDP'], 
-            y=filtered_data['Description'], 
-            orientation='h', 
-            name='Tax Cum Value % of GDP',
-            marker=dict(
-                color=[color_map[desc] for desc in filtered_data['Description']],
-                line=dict(color='black', width=1)  # Thin black border
-            ),  # Apply dynamic color map
-            text=filtered_data['Tax Cum Value % of GDP'].round(2).astype(str)+"%", 
-            textfont=dict(size=15, family='Arial', color='black', weight='bold'), 
-            textposition='outside'  # Position text 
-        ), row=1, col=2)
-
-    
-    # Update the layout for the combined figure for 1
-    fig.update_xaxes(row=1, col=2, range=[0, fig2_xaxis_max_value * 1.2], fixedrange=True, showline=True, linewidth=1.5, linecolor='grey', mirror=True, showgrid=True, gridcolor='lightgrey')
-    fig.update_yaxes(row=1, col=2, tickfont=dict(size=15),fixedrange=True, showline=True, linewidth=1.5, linecolor='grey', mirror=True, showgrid=True, gridcolor='lightgrey')
-
-    # Update the layout for the combined figure for 2
-    fig.update_xaxes(row=1, col=1, range=[0, fig1_xaxis_max_value * 1.2], fixedrange=True, showline=True, linewidth=1.5, linecolor='grey', mirror=True, showgrid=True, gridcolor='lightgrey')
-    fig.update_yaxes(row=1, col=1, tickfont=dict(size=15),fixedrange=True, showline=True, linewidth=1.5, linecolor='grey', mirror=True, showgrid=True, gridcolor='lightgrey')
-
-    # Update y-axes: remove y-axis labels from the first chart (left)
-    fig.update_yaxes(tickfont=dict(size=15, family='Arial', color='black', weight='bold'), row=1, col=1)
-
-    # Update layout for axis properties to remove y-axis title and reclaim space
-    fig.update_layout(
-        # title=f'Financial Data Comparison for {selected_date}',
-        # title_font=dict(size=15, family='Arial', color='black', weight='bold'),
-        plot_bgcolor="white",  # Ensures background doesn't add unexpected styles
-        paper_bgcolor="white",
-        xaxis1_title= xaxis1_title,
-        xaxis2_title= xaxis2_title,
-        xaxis1_title_font=dict(size=15, family='Arial', color='black', weight='bold'),
-        xaxis2_title_font=dict(size=15, family='Arial', color='black', weight='bold'),
-        showlegend=False,
-        height=700, width=1200, margin=dict(l=0, r=10, t=0, b=0, pad=0),
-        yaxis=dict(
-            title='',  # No title
-            showticklabels=True,  # Keep tick labels
-            automargin=True  # Automatically adjust margin to tick labels
-        ),
-    )
-
+    fig = fill_figure(figure_template, selected_category, view.frames_by_date[selected_date], view.palette)
 
     update_title(selected_date, selected_category)
 
     plot_placeholder.plotly_chart(fig, use_container_width=True) #End of function update plot
 
 
-
-#Animation of plot part of the code
-# Setup columns for buttons
-col1, col2 = st.columns(2)
-with col1:
-    prev_button = st.button('Previous')
-with col2:
-    next_button = st.button('Next')
-
-# Handle previous and next button functionality
-if prev_button:
+def previous_date():
     if st.session_state.current_index > 0:
         st.session_state.is_playing = False
         st.session_state.current_index -= 1
-elif next_button:
+
+def next_date():
     if st.session_state.current_index < len(unique_dates) - 1:
         st.session_state.current_index += 1
 
-slider = slider_placeholder.slider("Slider for Selecting Date Index", min_value=0, max_value=len(unique_dates) - 1, value=st.session_state.current_index, key="date_slider")
-selected_date = unique_dates[slider]
-update_plot(selected_date, selected_category)
-update_title(selected_date, selected_category)
-
-# Synchronize the current_index with the slider
-if slider != st.session_state.current_index:
-    st.session_state.current_index = slider
-    # Explicitly trigger updates
-    selected_date = unique_dates[slider]
-    update_plot(selected_date, selected_category)
-    update_title(selected_date, selected_category)
-    st.experimental_rerun()  # Optionally force a rerun if necessary
+def slider_moved():
+    st.session_state.current_index = st.session_state.date_slider
+
+
+#Animation of plot part of the code
+# Setup columns for buttons
+col1, col2 = st.columns(2)
+with col1:
+    st.button('Previous', on_click=previous_date)
+with col2:
+    st.button('Next', on_click=next_date)
 
 # Place the "Play" and "Pause" button at the top of the sidebar with unique keys
 play_button = st.sidebar.button("Play", key="play_button")
@@ -667,23 +217,20 @@ if play_button:
 
 if pause_button:
     st.session_state.is_playing = False
-    update_plot(unique_dates[st.session_state.current_index],selected_category)
-    update_title(unique_dates[st.session_state.current_index],selected_category)
 
-# Slider updates should trigger the plot and title updates outside the loop
-# selected_date = unique_dates[slider]
-update_plot(selected_date, selected_category)
-update_title(selected_date, selected_category)
+# The slider follows current_index, which the buttons and the slider's own
+# callback move; a single date has nothing to slide through
+if len(unique_dates) > 1:
+    st.session_state.date_slider = st.session_state.current_index
+    slider_placeholder.slider("Slider for Selecting Date Index", min_value=0, max_value=len(unique_dates) - 1, key="date_slider", on_change=slider_moved)
+update_plot(unique_dates[st.session_state.current_index], selected_category)
 
 # In the sidebar section of your Streamlit application
 selected_speed = st.sidebar.selectbox(
     "Select Animation Speed",
     ["Slow", "Medium", "Fast"],
-    key='selected_speed', index=0 
+    key='selected_speed', index=0, on_change=pause
 )
-if st.session_state.selected_speed != selected_speed:
-    st.session_state.selected_speed = selected_speed
-    st.session_state.is_playing = False  # Auto-pause if category changes
 
 #Map animation speeds to delay times
 speed_to_delay = {
@@ -697,14 +244,11 @@ animation_delay = speed_to_delay[selected_speed]
 # Animation loop controlled by the play button
 if st.session_state.get('is_playing', False):
     start_index = st.session_state.current_index
-    for i in range(start_index, len(unique_dates)):
+    for i in range(start_index + 1, len(unique_dates)):
+        time.sleep(animation_delay)  # Adjust sleep time to control
         if not st.session_state.is_playing:
             break
-        selected_date = unique_dates[i]
-        update_plot(selected_date, selected_category)
-        update_title(selected_date, selected_category)
         st.session_state.current_index = i
+        update_plot(unique_dates[i], selected_category)
         slider_placeholder.slider("Slider for Selecting Date Index", min_value=0, max_value=len(unique_dates) - 1, value=i, key=f"date_slider_{i}")
-        time.sleep(animation_delay)  # Adjust sleep time to control
-
-
+    st.session_state.is_playing = False
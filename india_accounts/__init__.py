@@ -0,0 +1,39 @@
+# Data layer shared by the india-budget Streamlit apps. Nothing here imports
+# Streamlit, so it can be used from batch jobs, benchmarks and other tools:
+#
+#     from india_accounts import DataStore, build_figure_template, fill_figure
+#     view = DataStore(password).get("Tax Details").view()
+#
+# Names are imported from their modules on first use, so importing the package
+# loads neither plotly nor msoffcrypto until something needs them.
+import importlib
+
+_EXPORTS = {
+	"config": ["WORKBOOKS", "ORDER_LISTS", "workbook_path", "read_password"],
+	"snapshot": ["WorkbookChanged", "decrypt_workbook", "load_workbook", "ingest_workbook"],
+	"dataset": ["DataStore", "CategoryDataset", "DatasetView"],
+	"transform": ["apply_schema", "transform_table", "add_derived_columns", "add_yoy_columns", "prepare_table", "sort_and_filter_dataframe", "select_items"],
+	"ranking": ["EXPENDITURE_TYPES", "ExpenditureRanking"],
+	"partition": ["TIME_SCALES", "DateCalendar", "build_date_index", "build_date_totals"],
+	"colors": ["get_unique_colors", "build_palette", "frame_colors"],
+	"titles": ["get_financial_year", "get_title"],
+	"figures": ["trace_specs", "build_figure_template", "fill_figure", "build_animation_frames", "build_animated_figure"],
+	"api": ["query"],
+	"sqlstore": ["SqlStore", "build_database"],
+}
+_MODULES = {name: module for module, names in _EXPORTS.items() for name in names}
+
+__all__ = list(_MODULES)
+
+
+def __getattr__(name):
+	module = _MODULES.get(name)
+	if module is None:
+		raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+	value = getattr(importlib.import_module(f"{__name__}.{module}"), name)
+	globals()[name] = value
+	return value
+
+
+def __dir__():
+	return sorted([*globals(), *__all__])
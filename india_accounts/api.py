@@ -0,0 +1,186 @@
+import argparse
+import json
+import logging
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+
+from india_accounts.config import DATA_DIR, WORKBOOKS, read_password
+from india_accounts.dataset import DataStore
+from india_accounts.ranking import EXPENDITURE_TYPES
+from india_accounts.snapshot import SNAPSHOT_DIR, WorkbookChanged
+from india_accounts.watcher import WorkbookWatcher
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8502
+
+
+def parse_date(value, name):
+	try:
+		return pd.Timestamp(value)
+	except ValueError:
+		raise ValueError(f"{name} must be a date like 2024-03-31, not {value!r}") from None
+
+
+# Rows as JSON-ready dicts: ISO dates, description strings and null for NaN.
+# Derived columns are float32, which go through their shortest repr so 0.54
+# is not sent as 0.5400000214576721.
+def to_records(df):
+	columns = {'Date': df['Date'].dt.strftime('%Y-%m-%d'), 'Description': df['Description'].astype(str)}
+	for column in df.columns.drop(['Date', 'Description']):
+		if df[column].dtype == 'float32':
+			columns[column] = df[column].astype(str).astype('float64')
+	out = df.assign(**columns).astype(object)
+	return out.where(out.notna(), None).to_dict('records')
+
+
+# Rows of a category from the store's cached, transformed views, for one date,
+# a from/to date range (inclusive, either end open) and/or a set of
+# descriptions. Expenditure Details rows are those of a type's top_n line
+# items, all of them by default. Pass the dataset already fetched from the
+# store to read that exact version. Raises ValueError for a bad query.
+def query(store, category, date=None, start=None, end=None, descriptions=None, selected_type='All', top_n=None, dataset=None):
+	if category not in WORKBOOKS:
+		raise ValueError(f"unknown category {category!r}; one of {', '.join(WORKBOOKS)}")
+	dataset = dataset or store.get(category)
+	if category == "Expenditure Details":
+		if selected_type not in EXPENDITURE_TYPES:
+			raise ValueError(f"type must be one of {', '.join(EXPENDITURE_TYPES)}")
+		item_count = dataset.item_count(selected_type)
+		if top_n is None:
+			top_n = item_count
+		elif not 1 <= top_n <= item_count:
+			raise ValueError(f"top_n must be between 1 and {item_count} for type {selected_type}")
+		view = dataset.view(selected_type, top_n)
+	else:
+		view = dataset.view()
+
+	if date is not None:
+		rows = view.frames_by_date.get(parse_date(date, "date"), view.df.iloc[:0])
+	else:
+		rows = view.df
+	if start is not None:
+		rows = rows[rows['Date'] >= parse_date(start, "from")]
+	if end is not None:
+		rows = rows[rows['Date'] <= parse_date(end, "to")]
+	if descriptions:
+		rows = rows[rows['Description'].isin(descriptions)]
+
+	result = {"category": category, "version": dataset.version, "columns": list(view.df.columns), "rows": to_records(rows)}
+	if category == "Expenditure Details":
+		result.update(type=selected_type, top_n=top_n)
+	return result
+
+
+# GET /categories                  category names and current data versions
+# GET /rows?category=Tax+Details&date=2024-03-31
+# GET /rows?category=...&from=2023-04-30&to=2024-03-31&description=A&description=B
+#          [&type=Capital&top_n=10]  (Expenditure Details)
+# Responses carry the data version as their ETag, so a client polling with
+# If-None-Match gets an empty 304 until the workbook changes. A workbook that
+# is missing or being replaced is a 503, so the client retries.
+class QueryHandler(BaseHTTPRequestHandler):
+	store = None
+
+	def do_GET(self):
+		try:
+			self.route()
+		except ConnectionError:
+			# The client went away
+			pass
+		except (OSError, WorkbookChanged) as e:
+			logger.warning("could not serve %s: %r", self.path, e)
+			self.send_json(HTTPStatus.SERVICE_UNAVAILABLE, {"error": f"data unavailable, retry shortly: {e}"})
+
+	def route(self):
+		url = urlsplit(self.path)
+		params = parse_qs(url.query)
+		if url.path == "/categories":
+			versions = {category: self.store.get(category).version for category in WORKBOOKS}
+			etag = '"' + "-".join(version[:16] for version in versions.values()) + '"'
+			return self.respond(etag, lambda: {"categories": versions})
+		if url.path != "/rows":
+			return self.send_json(HTTPStatus.NOT_FOUND, {"error": f"no such endpoint {url.path}"})
+
+		def param(name, convert=str):
+			values = params.get(name)
+			return convert(values[-1]) if values else None
+
+		try:
+			category = param("category")
+			if category is None:
+				raise ValueError("category is required")
+			if category not in WORKBOOKS:
+				raise ValueError(f"unknown category {category!r}; one of {', '.join(WORKBOOKS)}")
+			top_n = param("top_n", int)
+		except ValueError as e:
+			return self.send_json(HTTPStatus.BAD_REQUEST, {"error": str(e)})
+		# The URL names the query, so the version alone tells whether it
+		# changed. The body is read from the same dataset as the tag.
+		dataset = self.store.get(category)
+		etag = f'"{dataset.version[:16]}"'
+		self.respond(etag, lambda: query(self.store, category, param("date"), param("from"), param("to"),
+			params.get("description"), param("type") or 'All', top_n, dataset))
+
+	# 304 when the client already has this version, else the body built by make_body
+	def respond(self, etag, make_body):
+		if etag in [tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")]:
+			self.send_response(HTTPStatus.NOT_MODIFIED)
+			self.send_header("ETag", etag)
+			self.end_headers()
+			return
+		try:
+			body = make_body()
+		except ValueError as e:
+			return self.send_json(HTTPStatus.BAD_REQUEST, {"error": str(e)})
+		self.send_json(HTTPStatus.OK, body, etag)
+
+	def send_json(self, status, body, etag=None):
+		payload = json.dumps(body).encode("utf-8")
+		self.send_response(status)
+		self.send_header("Content-Type", "application/json")
+		self.send_header("Content-Length", str(len(payload)))
+		if etag is not None:
+			self.send_header("ETag", etag)
+			self.send_header("Cache-Control", "no-cache")
+		self.end_headers()
+		self.wfile.write(payload)
+
+	def log_message(self, format, *args):
+		logger.info("%s %s", self.address_string(), format % args)
+
+
+# Read-only HTTP server over a DataStore, refreshed by its own watcher. It
+# runs outside Streamlit, so polling it never reruns an app session; with the
+# default shared directory it maps the views the app workers published.
+def make_server(store, host="127.0.0.1", port=DEFAULT_PORT):
+	handler = type("StoreQueryHandler", (QueryHandler,), {"store": store})
+	return ThreadingHTTPServer((host, port), handler)
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Serve the cleaned budget datasets as read-only JSON")
+	parser.add_argument("--host", default="127.0.0.1", help="interface to listen on (default: localhost only)")
+	parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+	parser.add_argument("--data-dir", default=DATA_DIR)
+	parser.add_argument("--snapshot-dir", default=SNAPSHOT_DIR)
+	args = parser.parse_args()
+
+	logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+	store = DataStore(read_password(), args.data_dir, args.snapshot_dir)
+	WorkbookWatcher(store).start()
+	server = make_server(store, args.host, args.port)
+	print(f"serving on http://{args.host}:{server.server_port}")
+	try:
+		server.serve_forever()
+	except KeyboardInterrupt:
+		pass
+	finally:
+		server.server_close()
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,194 @@
+import argparse
+import io
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import plotly
+
+from india_accounts.colors import build_palette
+from india_accounts.config import DATA_DIR, ORDER_LISTS, WORKBOOKS, read_password, workbook_path
+from india_accounts.figures import build_figure_template, fill_figure
+from india_accounts.partition import build_date_index, build_date_totals
+from india_accounts.snapshot import decrypt_file
+from india_accounts.titles import get_title
+from india_accounts.transform import apply_schema, sort_and_filter_dataframe, transform_table
+
+DEFAULT_SCALES = [1, 10, 100]
+MEASURE_COLUMNS = ["BE", "Actual", "Month_Cum_Year_CY"]
+
+# A p50 this much slower than the baseline is reported as a regression
+REGRESSION_RATIO = 1.2
+
+
+# Synthetic version of a raw table with `factor` times the line items per
+# date: every description is repeated with a numbered suffix and jittered
+# measures. Dates are left alone since dd/mm/yy cannot hold centuries of
+# history. The order list is extended to match.
+def scale_table(df, cat_order_list, factor, seed=0):
+	if factor == 1:
+		return df, cat_order_list
+	rng = np.random.default_rng(seed)
+	copies = [df]
+	for k in range(1, factor):
+		copy = df.copy()
+		copy['Description'] = copy['Description'].astype(str).str.strip() + f' [{k}]'
+		for column in MEASURE_COLUMNS:
+			if column in copy:
+				copy[column] = pd.to_numeric(copy[column]) * rng.uniform(0.5, 1.5, len(copy))
+		copies.append(copy)
+	if cat_order_list is not None:
+		cat_order_list = cat_order_list + [f'{description} [{k}]' for k in range(1, factor) for description in cat_order_list]
+	return pd.concat(copies, ignore_index=True), cat_order_list
+
+
+def summarize(samples, peak_bytes):
+	ms = np.asarray(samples) * 1000
+	return {
+		"runs": len(ms),
+		"mean_ms": round(float(ms.mean()), 3),
+		"p50_ms": round(float(np.percentile(ms, 50)), 3),
+		"p90_ms": round(float(np.percentile(ms, 90)), 3),
+		"p99_ms": round(float(np.percentile(ms, 99)), 3),
+		"max_ms": round(float(ms.max()), 3),
+		"peak_mb": round(peak_bytes / 2**20, 3),
+	}
+
+
+# Time fn(arg) once per arg, then run it once more under tracemalloc for its
+# peak memory. Preparing the args (e.g. copying a frame) is not timed.
+def measure(fn, args):
+	samples = []
+	result = None
+	for arg in args:
+		start = time.perf_counter()
+		result = fn(arg)
+		samples.append(time.perf_counter() - start)
+	tracemalloc.start()
+	fn(args[-1])
+	_, peak = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+	return result, summarize(samples, peak)
+
+
+def copies(df, repeat):
+	return [df.copy() for _ in range(repeat + 1)]
+
+
+# Every stage of one category at one scale, mirroring what the app does from
+# the raw workbook frame to a rendered frame
+def bench_table(category, raw, cat_order_list, repeat, max_frames):
+	results = {}
+
+	if category == "Expenditure Details":
+		typed = apply_schema(raw.copy(), category)
+		_, results["sort_and_filter"] = measure(lambda df: sort_and_filter_dataframe(df, 'All', 15), [typed] * repeat)
+
+	transformed, results["transform"] = measure(lambda df: transform_table(df, category, cat_order_list), copies(raw, repeat))
+	df, axes = transformed
+
+	(frames_by_date, totals_by_date), results["date_index"] = measure(lambda df: (build_date_index(df), build_date_totals(df)), [df] * repeat)
+
+	template = build_figure_template(category, axes)
+	palette = build_palette(df['Description'])
+	dates = list(frames_by_date)[-max_frames:]
+
+	def update_plot(date):
+		return fill_figure(template, category, frames_by_date[date], palette)
+
+	fig, results["update_plot"] = measure(update_plot, dates)
+	_, results["serialize"] = measure(lambda fig: fig.to_json(), [fig] * len(dates))
+	_, results["update_title"] = measure(lambda date: get_title(date, category, totals_by_date), dates)
+	return results
+
+
+def bench_workbook(path, password, repeat):
+	results = {}
+	excel_content, results["decrypt"] = measure(lambda path: decrypt_file(path, password), [path] * repeat)
+	raw, results["read_excel"] = measure(lambda content: pd.read_excel(io.BytesIO(content), sheet_name="Sheet1"), [excel_content.getvalue()] * repeat)
+	return raw, results
+
+
+def git_commit():
+	try:
+		return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+	except (OSError, subprocess.CalledProcessError):
+		return None
+
+
+def run(categories, scales, repeat, max_frames, data_dir, password):
+	rows = []
+	for category in categories:
+		path = workbook_path(category, data_dir)
+		raw, load_results = bench_workbook(path, password, repeat)
+		for stage, summary in load_results.items():
+			rows.append(dict(category=category, scale=1, rows=len(raw), stage=stage, **summary))
+			print_row(rows[-1])
+
+		for scale in scales:
+			scaled, cat_order_list = scale_table(raw, ORDER_LISTS[category], scale)
+			for stage, summary in bench_table(category, scaled, cat_order_list, repeat, max_frames).items():
+				rows.append(dict(category=category, scale=scale, rows=len(scaled), stage=stage, **summary))
+				print_row(rows[-1])
+	return rows
+
+
+def print_row(row):
+	print(f'{row["category"]:<20} x{row["scale"]:<5} {row["stage"]:<16} p50 {row["p50_ms"]:>10.3f}ms  p90 {row["p90_ms"]:>10.3f}ms  p99 {row["p99_ms"]:>10.3f}ms  peak {row["peak_mb"]:>9.3f}MB', flush=True)
+
+
+# Print stages whose p50 moved by more than REGRESSION_RATIO against a saved run
+def compare(rows, baseline_path):
+	with open(baseline_path) as f:
+		baseline = {(r["category"], r["scale"], r["stage"]): r for r in json.load(f)["results"]}
+	for row in rows:
+		old = baseline.get((row["category"], row["scale"], row["stage"]))
+		if old is None or not old["p50_ms"]:
+			continue
+		ratio = row["p50_ms"] / old["p50_ms"]
+		if ratio > REGRESSION_RATIO or ratio < 1 / REGRESSION_RATIO:
+			label = "REGRESSION" if ratio > 1 else "improved"
+			print(f'{label:<10} {row["category"]:<20} x{row["scale"]:<5} {row["stage"]:<16} {old["p50_ms"]:.3f}ms -> {row["p50_ms"]:.3f}ms ({ratio:.2f}x)')
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Benchmark load, transform and frame render stages outside the browser")
+	parser.add_argument("--categories", nargs="+", default=list(WORKBOOKS), choices=list(WORKBOOKS), metavar="CATEGORY")
+	parser.add_argument("--scales", nargs="+", type=int, default=DEFAULT_SCALES, help="line-item multipliers for synthetic data (1 = real workbooks)")
+	parser.add_argument("--repeat", type=int, default=5, help="runs per whole-table stage")
+	parser.add_argument("--frames", type=int, default=24, help="latest dates to render per frame stage")
+	parser.add_argument("--data-dir", default=DATA_DIR)
+	parser.add_argument("--output", default="bench_results.json")
+	parser.add_argument("--baseline", help="earlier --output file to compare against")
+	args = parser.parse_args()
+
+	rows = run(args.categories, args.scales, args.repeat, args.frames, args.data_dir, read_password())
+	report = {
+		"meta": {
+			"created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+			"git_commit": git_commit(),
+			"python": platform.python_version(),
+			"pandas": pd.__version__,
+			"plotly": plotly.__version__,
+			"platform": platform.platform(),
+			"repeat": args.repeat,
+			"frames": args.frames,
+			"scales": args.scales,
+		},
+		"results": rows,
+	}
+	with open(args.output, "w") as f:
+		json.dump(report, f, indent=1)
+	print(f"wrote {args.output}")
+
+	if args.baseline:
+		compare(rows, args.baseline)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,23 @@
+import colorsys
+
+import numpy as np
+
+
+def get_unique_colors(n):
+	# Generate colors using HSV transformed to RGB
+	hues = [x/n for x in range(n)]  # Generate n distinct hues
+	colors = [colorsys.hsv_to_rgb(h, 1, 1) for h in hues]  # Convert HSV to RGB
+	# Convert RGB from 0-1 to 0-255 scale and format as hex
+	hex_colors = ['#%02x%02x%02x' % (int(r*255), int(g*255), int(b*255)) for r, g, b in colors]
+	return hex_colors
+
+# One colour per category of an ordered categorical Description column (the
+# order list, or the Expenditure ranking), indexed by category code. Built once
+# per dataset so every frame and every process colours a line item the same.
+def build_palette(descriptions):
+	return np.array(get_unique_colors(len(descriptions.cat.categories)))
+
+
+# Bar colours of one frame: a lookup by category code, no per-row work
+def frame_colors(palette, filtered_data):
+	return palette[filtered_data['Description'].cat.codes.to_numpy()].tolist()
@@ -0,0 +1,141 @@
+import os
+
+try:
+	import tomllib
+except ImportError:  # Python < 3.11
+	import toml as tomllib
+
+# Workbook behind each category of the app
+WORKBOOKS = {
+	"Account Summary": "T01_Main.xlsx",
+	"Tax Details": "T02_TAX_Details.xlsx",
+	"NonTax Details": "T03_NonTAX_Details.xlsx",
+	"NonDebt Details": "T04_NonDebt_Details.xlsx",
+	"Expenditure Details": "T12_Expenditure.xlsx",
+	"Subsidy Details": "T01_Subsidies.xlsx",
+	"Financing Details": "T01_Financing.xlsx",
+}
+
+# Directory holding the workbooks, e.g. a set written by india_accounts.synth
+DATA_DIR = os.environ.get("INDIA_ACCOUNTS_DATA_DIR", ".")
+
+# Where india-budget.py draws frames from: "memory" holds every view in the
+# process; "sqlite" queries each date's rows from the database written by
+# india_accounts.sqlstore, so memory stays flat however long the history gets
+FRAME_SOURCE = os.environ.get("INDIA_ACCOUNTS_FRAME_SOURCE", "memory")
+
+
+def workbook_path(category, data_dir=None):
+	return os.path.join(data_dir or DATA_DIR, WORKBOOKS[category])
+
+#List for defining sorting order for "Account Summary" & "Tax Details"
+main_cat_order_list = [
+	"Revenue Receipts",
+	"Rev Recp - Tax Revenue Net",
+	"Rev Recp - Non Tax Revenue",
+	"Non Debt Capital Receipt",
+	"Non Debt - Recovery of Loans",
+	"Non Debt - Other Receipt",
+	"Total Recp - RevRecp Plus NonDebtRecp",
+	"Revenue Expenditure",
+	"Rev Exp - Interest Payments",
+	"Capital Expenditure",
+	"Cap Exp - Loan Disbursed",
+	"Total Exp - RevExp + CapExp",
+	"Fiscal Deficit - TotalExp Minus TotalRecp",
+	"Revenue Deficit - RevExp Minus RevRecp",
+	"Primary Deficit - FisicalDef Minus InterestPay"
+]
+
+tax_order_list = [
+	"Gross Tax Revenue",
+	"Corporation Tax",
+	"Income Tax",
+	"Goods & Service Tax",
+	"UT GST",
+	"Customs",
+	"Union Excise Duties",
+	"Service Tax",
+	"Other Taxes",
+	"NCCD to NDRF",
+	"Assignment to States",
+	"GST Comp Cess",
+	"IGST"
+]
+
+nontax_order_list = [
+	"A.Interest Receipts",
+	"B.Dividend & Profits",
+	"C.NonTaxRev of UTs",
+	"D.Fiscal Services Net",
+	"D.General Services Net",
+	"D.Social Services",
+	"D.Economic Services Net",
+	"D.Grant in Aid",
+	"Total of D",
+	"Total NonTax Rev"
+]
+
+nondebt_order_list = [
+	"Gross Recoveries",
+	"Less Recoveries of Ways&Means Adv&Loans to Govt Emp",
+	"Less Expenditure Netted",
+	"Less Short Term Loans",
+	"Net Recoveries Loans",
+	"Net Issue of Bonus Share",
+	"Misc Cap Receipts",
+	"Misc-Other Receipts",
+	"Misc-Issue Bonds & Shares",
+	"Misc-Disinvestment Govt Equity",
+	"Misc-Monetization of Highways",
+	"Misc-Disinvestment Govt Equity in PSB & FIs",
+	"Misc-Listing Insurance Co",
+	"Total Non Debt Receipts"
+]
+
+financing_order_list = [
+	"External Financing",
+	"Domestic Financing",
+	"Market Borrowing",
+	"Securities Against Small Savings",
+	"State Provident Funds",
+	"Special Deposits",
+	"National Small Saving Fund",
+	"Saving Deposit and Certificates",
+	"Public Provident Funds",
+	"Investment in Securities",
+	"Income or Expenditure of NSSF",
+	"Others",
+	"Cash Balance (Decrease / Increase)",
+	"Total Financing"
+]
+
+subsidy_order_list = [
+	"Food Subsidy",
+	"Nutrient Based Fertilizers Subsidy",
+	"Urea Subsidy",
+	"Petroleum",
+	"Total Major Subsidies"
+]
+
+# Sorting order of each category; Expenditure Details is ordered by its BE ranking
+ORDER_LISTS = {
+	"Account Summary": main_cat_order_list,
+	"Tax Details": tax_order_list,
+	"NonTax Details": nontax_order_list,
+	"NonDebt Details": nondebt_order_list,
+	"Expenditure Details": None,
+	"Subsidy Details": subsidy_order_list,
+	"Financing Details": financing_order_list,
+}
+
+SECRETS_PATH = os.path.join(".streamlit", "secrets.toml")
+
+
+# Workbook password for tools running outside Streamlit: DB_PASSWORD or the secrets file
+def read_password(secrets_path=SECRETS_PATH):
+	password = os.environ.get("DB_PASSWORD")
+	if password:
+		return password
+	with open(secrets_path, encoding="utf-8") as f:
+		return tomllib.loads(f.read())["db_password"]
@@ -0,0 +1,295 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import pyarrow as pa
+
+from india_accounts.colors import build_palette
+from india_accounts.config import ORDER_LISTS, WORKBOOKS, workbook_path
+from india_accounts.partition import DateCalendar, append_rows, build_date_index, build_date_totals
+from india_accounts.ranking import EXPENDITURE_TYPES, ExpenditureRanking
+from india_accounts.shared import SHARED_DIR, SharedFrames
+from india_accounts.snapshot import SNAPSHOT_DIR, ingest_workbook, workbook_digest
+from india_accounts.transform import add_derived_columns, apply_schema, copy_yoy_columns, merge_axes, prepare_table, transform_table, yoy_table
+
+logger = logging.getLogger(__name__)
+
+# Part of every shared file name; bumped whenever the columns of a view or
+# ranking change, so no process maps files published by older code
+SHARED_LAYOUT = 3
+
+# Views kept per dataset, least recently used dropped first. Every top-N of
+# Expenditure Details is a view, and the views kept are rebuilt on refresh.
+MAX_VIEWS = 32
+
+
+# Chart-ready table of a category (or Expenditure type/top-N) with everything
+# a frame is drawn from: axis ranges, dates and their calendar, per-date
+# slices and totals, and palette. Served by reference to every session, so
+# it is read-only: the slices are views of df, and mapped (shared) columns
+# cannot be written.
+class DatasetView:
+	def __init__(self, df, axes, totals_by_date=None):
+		self.df = df
+		self.axes = axes
+		self.frames_by_date = build_date_index(df)
+		self.dates = list(self.frames_by_date)
+		self.calendar = DateCalendar(self.dates)
+		self.totals_by_date = build_date_totals(df) if totals_by_date is None else totals_by_date
+		self.palette = build_palette(df['Description'])
+
+	# View with the derived rows of new months added; only the delta is
+	# derived and totalled. Year-over-year columns are looked up in yoy, a
+	# yoy_table of the whole new version: the delta alone lacks the months a
+	# year earlier, and a backfilled month is the year-earlier month of another.
+	def extend(self, delta_df, delta_axes, yoy):
+		df = append_rows(self.df, delta_df)
+		if delta_df['Date'].min() < self.df['Date'].max():
+			# A backfilled month lands in the middle
+			df = prepare_table(df)
+		df = copy_yoy_columns(df, yoy)
+		totals_by_date = {**self.totals_by_date, **build_date_totals(delta_df)}
+		return DatasetView(df, merge_axes(self.axes, delta_axes), totals_by_date)
+
+
+def view_part(key):
+	return "-".join(["view", *map(str, key)])
+
+
+# One category's data at one workbook version. Views are built on first use
+# and the dataset is never changed after that: a newer workbook produces a new
+# dataset, extended from this one when it only gained months. With a shared
+# store, views and the Expenditure ranking are published for, and mapped from,
+# the other worker processes; raw may then be a loader that is never called.
+class CategoryDataset:
+	def __init__(self, category, raw, version, ranking=None, shared=None):
+		self.category = category
+		self.version = version
+		self.shared = shared
+		self._raw = raw
+		self._ranking = ranking
+		self._views = OrderedDict()
+		self._lock = threading.RLock()
+
+	@property
+	def raw(self):
+		if callable(self._raw):
+			with self._lock:
+				if callable(self._raw):
+					self._raw = self._raw()
+		return self._raw
+
+	def raw_loaded(self):
+		return not callable(self._raw)
+
+	@property
+	def ranking(self):
+		if self.category != "Expenditure Details":
+			return None
+		if self._ranking is None:
+			with self._lock:
+				if self._ranking is None:
+					self._ranking = self._open_ranking() or self._publish_ranking(ExpenditureRanking(apply_schema(self.raw.copy(), self.category)))
+		return self._ranking
+
+	def item_count(self, selected_type):
+		return self.ranking.item_count(selected_type)
+
+	# Type and top-N only apply to Expenditure Details
+	def view(self, selected_type='All', top_n=15):
+		key = (selected_type, top_n) if self.category == "Expenditure Details" else ()
+		view = self._views.get(key)
+		if view is not None:
+			try:
+				self._views.move_to_end(key)
+			except KeyError:
+				# Dropped by another thread since
+				pass
+			return view
+		with self._lock:
+			view = self._views.get(key)
+			if view is None:
+				view = self._views[key] = self._open_view(key) or self._publish_view(key, DatasetView(*self._transform(*key)))
+				while len(self._views) > MAX_VIEWS:
+					self._views.popitem(last=False)
+		return view
+
+	def view_keys(self):
+		with self._lock:
+			return list(self._views)
+
+	# Snapshot of the views, safe to iterate while sessions touch them
+	def _view_items(self):
+		with self._lock:
+			return list(self._views.items())
+
+	def _transform(self, selected_type='All', top_n=15):
+		if self.category == "Expenditure Details":
+			return add_derived_columns(self.ranking.top(selected_type, top_n), self.category)
+		return transform_table(self.raw.copy(), self.category, ORDER_LISTS[self.category])
+
+	# Dataset of a newer workbook version that added the rows in delta
+	def extend(self, delta, raw, version):
+		if self.category != "Expenditure Details":
+			dataset = CategoryDataset(self.category, raw, version, shared=self.shared)
+			if self._views:
+				delta_df, delta_axes = transform_table(delta.copy(), self.category, ORDER_LISTS[self.category])
+				yoy = yoy_table(apply_schema(raw.copy(), self.category, ORDER_LISTS[self.category]), self.category)
+				for key, view in self._view_items():
+					dataset._views[key] = dataset._publish_view(key, view.extend(delta_df, delta_axes, yoy))
+			return dataset
+
+		typed_delta = apply_schema(delta.copy(), self.category)
+		ranking = self.ranking.extend(typed_delta)
+		dataset = CategoryDataset(self.category, raw, version, shared=self.shared)
+		dataset._ranking = dataset._publish_ranking(ranking)
+		# A new latest month re-ranks the line items, and top-N views are then
+		# rebuilt on first use from the ranked rows in memory
+		if ranking.rankings == self.ranking.rankings and self._views:
+			delta_dates = typed_delta['Date'].unique()
+			yoy = yoy_table(ranking.df, self.category)
+			for (selected_type, top_n), view in self._view_items():
+				top_rows = ranking.top(selected_type, top_n)
+				delta_rows = top_rows[top_rows['Date'].isin(delta_dates)].copy()
+				dataset._views[selected_type, top_n] = dataset._publish_view((selected_type, top_n), view.extend(*add_derived_columns(delta_rows, self.category), yoy))
+		return dataset
+
+	def shared_prefix(self):
+		return os.path.splitext(WORKBOOKS[self.category])[0] + "-"
+
+	def _shared_name(self, part):
+		return f"{self.shared_prefix()}{self.version[:16]}-l{SHARED_LAYOUT}-{part}"
+
+	def _open_view(self, key):
+		opened = self.shared and self.shared.open(self._shared_name(view_part(key)))
+		if not opened:
+			return None
+		df, metadata = opened
+		return DatasetView(df, metadata["axes"])
+
+	# Publish a freshly built view and serve the mapped copy, so this process
+	# holds no private copy either
+	def _publish_view(self, key, view):
+		if self.shared is None:
+			return view
+		axes = {name: value if isinstance(value, str) else float(value) for name, value in view.axes.items()}
+		try:
+			self.shared.publish(self._shared_name(view_part(key)), view.df, {"axes": axes})
+		except (OSError, pa.ArrowException):
+			logger.warning("could not share %s %s, serving a private copy", self.category, key, exc_info=True)
+			return view
+		return self._open_view(key) or view
+
+	def _open_ranking(self):
+		if self.shared is None:
+			return None
+		frames = {}
+		for part in ["typed", *(f"rows-{expenditure_type}" for expenditure_type in EXPENDITURE_TYPES)]:
+			opened = self.shared.open(self._shared_name(part))
+			if not opened:
+				return None
+			frames[part], metadata = opened
+			if part == "typed":
+				rankings = metadata["rankings"]
+		return ExpenditureRanking.from_parts(frames, rankings)
+
+	def _publish_ranking(self, ranking):
+		if self.shared is None:
+			return ranking
+		frames, rankings = ranking.parts()
+		try:
+			# Rows first: the typed frame carries the rankings and completes the set
+			for part in sorted(frames, reverse=True):
+				self.shared.publish(self._shared_name(part), frames[part], {"rankings": rankings} if part == "typed" else None)
+		except (OSError, pa.ArrowException):
+			logger.warning("could not share the %s ranking, serving a private copy", self.category, exc_info=True)
+			return ranking
+		return self._open_ranking() or ranking
+
+
+# Size and mtime of a workbook, a cheap check for whether it may have changed
+def file_stamp(path):
+	stat = os.stat(path)
+	return stat.st_size, stat.st_mtime_ns
+
+
+# Current dataset of every category, shared by all sessions. refresh()
+# re-ingests a workbook that changed on disk (incrementally when it only gained
+# months) and builds the views in use before replacing the dataset in one
+# assignment, so readers see either the old version or the new one, never a
+# half-built one. Listeners are told about each replacement.
+class DataStore:
+	def __init__(self, password, data_dir=None, snapshot_dir=SNAPSHOT_DIR, shared_dir=SHARED_DIR):
+		self.password = password
+		self.data_dir = data_dir
+		self.snapshot_dir = snapshot_dir
+		self.shared = None
+		if shared_dir:
+			try:
+				self.shared = SharedFrames(shared_dir)
+			except PermissionError:
+				logger.warning("not sharing datasets through %s", shared_dir, exc_info=True)
+		self.datasets = {}
+		self._stamps = {}
+		self._locks = {category: threading.Lock() for category in WORKBOOKS}
+		self._listeners = []
+
+	def path(self, category):
+		return workbook_path(category, self.data_dir)
+
+	# Called as listener(category, dataset) after a dataset is replaced
+	def subscribe(self, listener):
+		self._listeners.append(listener)
+
+	# Loaded on first use; later versions only arrive through refresh()
+	def get(self, category):
+		dataset = self.datasets.get(category)
+		if dataset is None:
+			self.refresh(category)
+			dataset = self.datasets[category]
+		return dataset
+
+	# Returns True when a new version of the dataset was swapped in
+	def refresh(self, category):
+		path = self.path(category)
+		stamp = file_stamp(path)
+		if self._stamps.get(category) == stamp:
+			return False
+		with self._locks[category]:
+			if self._stamps.get(category) == stamp:
+				return False
+			current = self.datasets.get(category)
+			start = time.perf_counter()
+			dataset = self._load(category, path, current)
+			if current is not None:
+				for key in current.view_keys():
+					dataset.view(*key)
+			self.datasets[category] = dataset
+			self._stamps[category] = stamp
+		if current is None or dataset is current:
+			return False
+		logger.info("swapped in %s version %s in %.3fs", category, dataset.version[:16], time.perf_counter() - start)
+		if self.shared is not None:
+			self.shared.prune(dataset.shared_prefix(), dataset._shared_name(""))
+		for listener in self._listeners:
+			listener(category, dataset)
+		return True
+
+	def _load(self, category, path, current):
+		digest = workbook_digest(path)
+		if current is not None and current.version == digest:
+			return current
+		if current is None or not current.raw_loaded():
+			# Views already published by another worker are mapped without
+			# decrypting the workbook at all. A load that runs after the file
+			# moved on raises WorkbookChanged rather than labelling the newer
+			# rows with this digest; the watcher then swaps in the new version.
+			def load():
+				return ingest_workbook(path, self.password, snapshot_dir=self.snapshot_dir, digest=digest)[0]
+			return CategoryDataset(category, load, digest, shared=self.shared)
+		raw, delta = ingest_workbook(path, self.password, current.raw, snapshot_dir=self.snapshot_dir, digest=digest)
+		if delta is None:
+			return CategoryDataset(category, raw, digest, shared=self.shared)
+		return current.extend(delta, raw, digest)
@@ -0,0 +1,170 @@
+import argparse
+import multiprocessing
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import textwrap
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+from PIL import Image
+
+from india_accounts.colors import build_palette, frame_colors
+from india_accounts.config import DATA_DIR, ORDER_LISTS, WORKBOOKS, read_password, workbook_path
+from india_accounts.figures import trace_specs
+from india_accounts.partition import TIME_SCALES, DateCalendar, build_date_index, build_date_totals
+from india_accounts.ranking import EXPENDITURE_TYPES
+from india_accounts.snapshot import SNAPSHOT_DIR, load_workbook
+from india_accounts.titles import get_title
+from india_accounts.transform import transform_table
+
+# Matches the Plotly figure: 1200x700 plus room for the title
+FIGSIZE = (12, 7.6)
+DPI = 100
+BAR_HEIGHT = 0.8
+GRID_COLOR = 'lightgrey'
+FRAME_PATTERN = "frame_%05d.png"
+# Characters per line of each x-axis title, so neither runs under the other
+# subplot: the left one spans 70% of the width less the descriptions
+XLABEL_WIDTHS = (40, 24)
+
+
+# Same layout as update_plot: absolute values on the left (70%), % of GDP on
+# the right (30%), shared descriptions, grouped horizontal bars with their
+# values written outside
+def draw_frame(selected_category, axes, filtered_data, title, palette):
+	fig = Figure(figsize=FIGSIZE, dpi=DPI, facecolor='white', layout='constrained')
+	ax1, ax2 = fig.subplots(1, 2, sharey=True, width_ratios=[0.7, 0.3])
+
+	descriptions = filtered_data['Description'].astype(str).tolist()
+	colors = frame_colors(palette, filtered_data)
+	positions = np.arange(len(descriptions))
+
+	specs = trace_specs(selected_category)
+	for ax, col in ((ax1, 1), (ax2, 2)):
+		col_specs = [spec for spec in specs if spec[2] == col]
+		# Plotly groups a subplot's traces bottom-up: first trace lowest
+		height = BAR_HEIGHT / len(col_specs)
+		for i, (column, name, _, opacity, suffix) in enumerate(col_specs):
+			values = filtered_data[column]
+			offset = (i - (len(col_specs) - 1) / 2) * height
+			bars = ax.barh(positions + offset, values, height=height, color=colors, alpha=opacity, edgecolor='black', linewidth=1, label=name)
+			ax.bar_label(bars, labels=(values.round(2).astype(str) + suffix).tolist(), padding=3, fontsize=11, fontweight='bold', family='sans-serif')
+
+		ax.grid(True, axis='both', color=GRID_COLOR)
+		ax.set_axisbelow(True)
+		for spine in ax.spines.values():
+			spine.set_color('grey')
+			spine.set_linewidth(1.5)
+
+	ax1.set_xlim(0, axes["fig1_xaxis_max_value"] * 1.2)
+	ax2.set_xlim(0, axes["fig2_xaxis_max_value"] * 1.2)
+	for ax, label, width in zip((ax1, ax2), (axes["xaxis1_title"], axes["xaxis2_title"]), XLABEL_WIDTHS):
+		ax.set_xlabel(textwrap.fill(label, width), fontsize=12, fontweight='bold')
+	ax1.set_yticks(positions, descriptions, fontsize=11, fontweight='bold')
+	ax1.set_ylim(-0.5, len(descriptions) - 0.5)
+	ax2.tick_params(axis='y', left=False)
+
+	# The page title is HTML; matplotlib gets its text
+	fig.suptitle(re.sub(r'<[^>]+>', '', title), fontsize=14)
+	fig.get_layout_engine().set(w_pad=0, wspace=0.03)
+	return fig
+
+
+def render_frame(job):
+	path, selected_category, axes, filtered_data, title, palette = job
+	draw_frame(selected_category, axes, filtered_data, title, palette).savefig(path, dpi=DPI)
+	return path
+
+
+# Render frames across a process pool; each worker writes its PNG straight to
+# disk so only the small per-date slices cross process boundaries
+def render_frames(jobs, max_workers=None):
+	max_workers = max_workers or os.cpu_count() or 1
+	context = multiprocessing.get_context("spawn")
+	with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as pool:
+		chunksize = max(1, len(jobs) // (max_workers * 4))
+		return list(pool.map(render_frame, jobs, chunksize=chunksize))
+
+
+def write_gif(paths, output, frame_duration):
+	frames = [Image.open(path).convert('P', palette=Image.Palette.ADAPTIVE) for path in paths]
+	frames[0].save(output, save_all=True, append_images=frames[1:], duration=frame_duration, loop=0, optimize=False)
+
+
+def find_ffmpeg():
+	return shutil.which(matplotlib.rcParams['animation.ffmpeg_path'])
+
+
+def write_mp4(frames_dir, output, frame_duration):
+	subprocess.run([
+		find_ffmpeg(), "-y", "-loglevel", "error",
+		"-framerate", f"{1000 / frame_duration:g}",
+		"-i", os.path.join(frames_dir, FRAME_PATTERN),
+		"-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2",  # libx264 needs even dimensions
+		"-c:v", "libx264", "-pix_fmt", "yuv420p",
+		output,
+	], check=True)
+
+
+# Render every date of a category's time scale, optionally limited to a from/to
+# window, and stitch the frames into output (.gif or .mp4)
+def export_animation(selected_category, output, password, selected_animation="MonthEnd", selected_type='All', top_n=15,
+		frame_duration=500, data_dir=None, snapshot_dir=SNAPSHOT_DIR, max_workers=None, start=None, end=None):
+	extension = os.path.splitext(output)[1].lower()
+	if extension not in (".gif", ".mp4"):
+		raise ValueError(f"unsupported output format {extension!r}; use .gif or .mp4")
+	if extension == ".mp4" and find_ffmpeg() is None:
+		raise RuntimeError("MP4 export needs ffmpeg on the PATH (or animation.ffmpeg_path); write a .gif instead")
+
+	df = load_workbook(workbook_path(selected_category, data_dir), password, snapshot_dir=snapshot_dir)
+	df, axes = transform_table(df, selected_category, ORDER_LISTS[selected_category], selected_type, top_n)
+	frames_by_date = build_date_index(df)
+	totals_by_date = build_date_totals(df) if selected_category == "Expenditure Details" else None
+	dates = DateCalendar(list(frames_by_date)).window(selected_animation, start and pd.Timestamp(start), end and pd.Timestamp(end))
+	if not dates:
+		raise ValueError(f"no {selected_animation} dates between {start or 'the start'} and {end or 'the end'}")
+	palette = build_palette(df['Description'])
+
+	with tempfile.TemporaryDirectory() as frames_dir:
+		jobs = []
+		for i, date in enumerate(dates):
+			title = get_title(date, selected_category, totals_by_date)
+			jobs.append((os.path.join(frames_dir, FRAME_PATTERN % i), selected_category, axes, frames_by_date[date], title, palette))
+		paths = render_frames(jobs, max_workers)
+		if extension == ".gif":
+			write_gif(paths, output, frame_duration)
+		else:
+			write_mp4(frames_dir, output, frame_duration)
+	return len(paths)
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Render a category's animation offline to a GIF or MP4")
+	parser.add_argument("category", choices=list(WORKBOOKS), metavar="CATEGORY")
+	parser.add_argument("--output", required=True, help="output file, .gif or .mp4")
+	parser.add_argument("--animation", choices=TIME_SCALES, default="MonthEnd")
+	parser.add_argument("--from", dest="start", help="first date to render, e.g. 2020-04-30")
+	parser.add_argument("--to", dest="end", help="last date to render")
+	parser.add_argument("--type", choices=EXPENDITURE_TYPES, default='All', help="Expenditure Details only")
+	parser.add_argument("--top-n", type=int, default=15, help="Expenditure Details only")
+	parser.add_argument("--delay", type=float, default=0.5, help="seconds per frame")
+	parser.add_argument("--workers", type=int, default=None, help="process pool size (default: CPU count)")
+	parser.add_argument("--data-dir", default=DATA_DIR)
+	parser.add_argument("--snapshot-dir", default=SNAPSHOT_DIR)
+	args = parser.parse_args()
+
+	start = time.perf_counter()
+	count = export_animation(args.category, args.output, read_password(), args.animation, args.type, args.top_n,
+		int(args.delay * 1000), args.data_dir, args.snapshot_dir, args.workers, args.start, args.end)
+	print(f"wrote {args.output}: {count} frames in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,64 @@
+import json
+import threading
+from collections import OrderedDict
+
+
+# Process-wide LRU of rendered single-frame figures, stored as Plotly JSON so
+# entries are immutable and safe to share between sessions. Bounded by total
+# JSON size. Animated figures are not worth caching: decoding one costs about
+# as much as assembling it again from its prebuilt frames.
+class FigureCache:
+	def __init__(self, max_bytes=64 * 1024 * 1024):
+		self.max_bytes = max_bytes
+		self.nbytes = 0
+		self.hits = 0
+		self.misses = 0
+		self._entries = OrderedDict()
+		self._lock = threading.Lock()
+
+	def get(self, key):
+		with self._lock:
+			serialized = self._entries.get(key)
+			if serialized is None:
+				self.misses += 1
+				return None
+			self._entries.move_to_end(key)
+			self.hits += 1
+		import plotly.graph_objects as go
+
+		return go.Figure(json.loads(serialized), _validate=False)
+
+	def put(self, key, fig):
+		serialized = fig.to_json()
+		with self._lock:
+			if key in self._entries:
+				self.nbytes -= len(self._entries.pop(key))
+			if len(serialized) > self.max_bytes:
+				return
+			self._entries[key] = serialized
+			self.nbytes += len(serialized)
+			while self.nbytes > self.max_bytes:
+				_, evicted = self._entries.popitem(last=False)
+				self.nbytes -= len(evicted)
+
+	# Drop the entries whose key matches, e.g. every figure of one category
+	def discard(self, predicate):
+		with self._lock:
+			for key in [key for key in self._entries if predicate(key)]:
+				self.nbytes -= len(self._entries.pop(key))
+
+	def clear(self):
+		with self._lock:
+			self._entries.clear()
+			self.nbytes = 0
+
+	def stats(self):
+		with self._lock:
+			lookups = self.hits + self.misses
+			return {
+				"entries": len(self._entries),
+				"bytes": self.nbytes,
+				"hits": self.hits,
+				"misses": self.misses,
+				"hit_rate": round(self.hits / lookups, 3) if lookups else None,
+			}
@@ -0,0 +1,163 @@
+import copy
+
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+from india_accounts.colors import frame_colors
+from india_accounts.transform import BE_ACTUAL_CATEGORIES
+
+# (value column, trace name, subplot column, bar opacity, text suffix) for each bar trace
+BE_ACTUAL_TRACES = [
+	('BE', 'Budget Estimate Rs Lakh Cr', 1, None, ''),
+	('Actual', 'Actual Spend Rs Lakh Cr', 1, 0.5, ''),
+	('BE % of GDP', 'Budget Estimate % of GDP', 2, None, '%'),
+	('Actual % of GDP', 'Actual Spend % of GDP', 2, 0.5, '%'),
+]
+
+TAX_TRACES = [
+	('Tax Cum Value', 'Tax Cumulative Value Rs Lakh Cr', 1, None, ''),
+	('Tax Cum Value % of GDP', 'Tax Cum Value % of GDP', 2, None, '%'),
+]
+
+BAR_TEXTFONT = dict(size=15, family='Arial', color='black', weight='bold')
+
+# Title drawn inside animated figures, where the page title cannot follow the frames
+ANIMATION_TITLE = dict(x=0.5, xanchor='center', font=dict(size=20, family='Arial', color='black'))
+
+
+def trace_specs(selected_category):
+	if selected_category in BE_ACTUAL_CATEGORIES:
+		return BE_ACTUAL_TRACES
+	if selected_category == "Tax Details":
+		return TAX_TRACES
+	return []
+
+
+# Everything about the figure that does not change between dates: subplots,
+# empty bar traces, axis styling and layout. Built once per category.
+def build_figure_template(selected_category, axes):
+	fig = make_subplots(rows=1, cols=2, shared_yaxes=True, specs=[[{"type": "bar"}, {"type": "bar"}]], column_widths=[0.7, 0.3], horizontal_spacing=0.01)
+
+	for column, name, col, opacity, suffix in trace_specs(selected_category):
+		marker = dict(line=dict(color='black', width=1))  # Thin black border
+		if opacity is not None:
+			marker['opacity'] = opacity
+		fig.add_trace(go.Bar(
+			x=[],
+			y=[],
+			orientation='h',
+			name=name,
+			marker=marker,
+			textfont=BAR_TEXTFONT,
+			textposition='outside'  # Position text
+		), row=1, col=col)
+
+	# Update the layout for the combined figure for 1
+	fig.update_xaxes(row=1, col=2, range=[0, axes["fig2_xaxis_max_value"] * 1.2], fixedrange=True, showline=True, linewidth=1.5, linecolor='grey', mirror=True, showgrid=True, gridcolor='lightgrey')
+	fig.update_yaxes(row=1, col=2, tickfont=dict(size=15),fixedrange=True, showline=True, linewidth=1.5, linecolor='grey', mirror=True, showgrid=True, gridcolor='lightgrey')
+
+	# Update the layout for the combined figure for 2
+	fig.update_xaxes(row=1, col=1, range=[0, axes["fig1_xaxis_max_value"] * 1.2], fixedrange=True, showline=True, linewidth=1.5, linecolor='grey', mirror=True, showgrid=True, gridcolor='lightgrey')
+	fig.update_yaxes(row=1, col=1, tickfont=dict(size=15),fixedrange=True, showline=True, linewidth=1.5, linecolor='grey', mirror=True, showgrid=True, gridcolor='lightgrey')
+
+	# Update y-axes: remove y-axis labels from the first chart (left)
+	fig.update_yaxes(tickfont=dict(size=15, family='Arial', color='black', weight='bold'), row=1, col=1)
+
+	# Update layout for axis properties to remove y-axis title and reclaim space
+	fig.update_layout(
+		plot_bgcolor="white",  # Ensures background doesn't add unexpected styles
+		paper_bgcolor="white",
+		xaxis1_title=axes["xaxis1_title"],
+		xaxis2_title=axes["xaxis2_title"],
+		xaxis1_title_font=dict(size=15, family='Arial', color='black', weight='bold'),
+		xaxis2_title_font=dict(size=15, family='Arial', color='black', weight='bold'),
+		showlegend=False,
+		height=700, width=1200, margin=dict(l=0, r=10, t=0, b=0, pad=0),
+		yaxis=dict(
+			title='',  # No title
+			showticklabels=True,  # Keep tick labels
+			automargin=True  # Automatically adjust margin to tick labels
+		),
+	)
+
+	# Kept as a plain dict; every frame gets its own deep copy, unvalidated
+	return fig.to_dict()
+
+
+# Figure for one date: a copy of the template with only the bar values,
+# labels, descriptions and colours swapped in. The template is shared by every
+# session, and go.Figure briefly pops each trace's "type" from the dict it is
+# given, so it only ever sees a copy.
+def fill_figure(template, selected_category, filtered_data, palette, compare=False):
+	fig = go.Figure(copy.deepcopy(template), _validate=False)
+	descriptions = filtered_data['Description'].tolist()
+	colors = frame_colors(palette, filtered_data)
+	with fig.batch_update():
+		for trace, (column, name, col, opacity, suffix) in zip(fig.data, trace_specs(selected_category)):
+			values = filtered_data[column]
+			text = values.round(2).astype(str)
+			if suffix:
+				text = text + suffix
+			if compare:
+				text = text + yoy_text(filtered_data, column, suffix)
+			trace.x = values.to_numpy()
+			trace.y = descriptions
+			trace.text = text.tolist()
+			trace.marker.color = colors
+	return fig
+
+
+# Bar label suffix comparing with the same month last FY, read from the
+# precomputed YoY columns: growth for Rs values, the change in percentage
+# points for % of GDP values, blank where there is no year-earlier month
+def yoy_text(filtered_data, column, suffix):
+	if suffix == '%':
+		change, unit = filtered_data[f"{column} YoY"], ' pp'
+	else:
+		change, unit = filtered_data[f"{column} YoY %"], '%'
+	text = ' (' + change.map('{:+.2f}'.format) + unit + ' YoY)'
+	return text.where(change.notna(), '')
+
+
+# One Plotly frame per date, each carrying its bars and its title
+def build_animation_frames(template, selected_category, frames, labels, titles, palette, compare=False):
+	animation_frames = []
+	for filtered_data, label, title in zip(frames, labels, titles):
+		data = fill_figure(template, selected_category, filtered_data, palette, compare).to_dict()["data"]
+		animation_frames.append({"name": label, "data": data, "layout": {"title": dict(ANIMATION_TITLE, text=title)}})
+	return animation_frames
+
+
+# All dates shipped in one figure, so Play/Pause and the date slider run in
+# the browser and cost the server nothing after the first render
+def build_animated_figure(template, animation_frames, start_index=0, frame_duration=500):
+	layout = copy.deepcopy(template["layout"])
+	play_args = {"frame": {"duration": frame_duration, "redraw": True}, "transition": {"duration": 0}, "fromcurrent": True, "mode": "immediate"}
+	jump_args = {"frame": {"duration": 0, "redraw": True}, "transition": {"duration": 0}, "mode": "immediate"}
+
+	layout["title"] = animation_frames[start_index]["layout"]["title"]
+	layout["updatemenus"] = [dict(
+		type='buttons',
+		direction='left',
+		showactive=False,
+		x=0, xanchor='left', y=-0.06, yanchor='top',
+		pad=dict(t=40, r=10),
+		buttons=[
+			dict(label='Play', method='animate', args=[None, play_args]),
+			dict(label='Pause', method='animate', args=[[None], dict(jump_args, frame={"duration": 0, "redraw": False})]),
+		],
+	)]
+	layout["sliders"] = [dict(
+		active=start_index,
+		x=0.12, len=0.88, y=-0.06, yanchor='top',
+		pad=dict(t=30),
+		font=dict(color='rgba(0,0,0,0)'),  # One tick per date is too dense to label
+		currentvalue=dict(font=dict(size=15, family='Arial', color='black')),
+		steps=[dict(label=frame["name"], method='animate', args=[[frame["name"]], jump_args]) for frame in animation_frames],
+	)]
+	layout["margin"] = dict(layout["margin"], t=50, b=130)
+	layout["height"] = layout["height"] + 180
+
+	# The frames are shared too, so go.Figure gets copies of them as well
+	animation_frames = copy.deepcopy(animation_frames)
+	return go.Figure({"data": animation_frames[start_index]["data"], "layout": layout, "frames": animation_frames}, _validate=False)
@@ -0,0 +1,65 @@
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+
+# Date -> rows of that date, sliced once per category so that drawing a frame
+# is a dict lookup instead of a boolean scan over the whole table. Tables are
+# sorted by date, so each slice is a view of the table rather than a copy.
+def build_date_index(df):
+	dates = df['Date'].to_numpy()
+	if len(dates) == 0:
+		return {}
+	if not (dates[1:] >= dates[:-1]).all():
+		return {date: frame for date, frame in df.groupby('Date', sort=False)}
+	starts = np.flatnonzero(np.r_[True, dates[1:] != dates[:-1]])
+	stops = np.r_[starts[1:], len(dates)]
+	return {df['Date'].iat[start]: df.iloc[start:stop] for start, stop in zip(starts, stops)}
+
+
+# Date -> (total BE, total Actual) for the Expenditure Details title, summed
+# in float64 so the rounded totals print cleanly
+def build_date_totals(df):
+	sums = df[['BE', 'Actual']].astype('float64').groupby(df['Date'], sort=False).sum().round(2)
+	return dict(zip(sums.index, zip(sums['BE'], sums['Actual'])))
+
+
+# Rows of later months appended to a frame. Categorical descriptions whose
+# categories differ (Expenditure line items) are unioned rather than decayed
+# to object.
+def append_rows(df, delta):
+	combined = pd.concat([df, delta], ignore_index=True)
+	if isinstance(df['Description'].dtype, pd.CategoricalDtype) and not isinstance(combined['Description'].dtype, pd.CategoricalDtype):
+		combined['Description'] = union_categoricals([df['Description'], delta['Description']])
+	return combined
+
+
+# Time scales a view can be stepped through
+TIME_SCALES = ["MonthEnd", "QuarterEnd", "YearEnd"]
+
+
+# Dates of a view at each time scale: every date, quarter-ends (Jun, Sep, Dec,
+# Mar) and FY-ends (Mar). Built once per view, so the slider, Previous/Next
+# and playback step through any scale by index arithmetic.
+class DateCalendar:
+	def __init__(self, dates):
+		index = pd.DatetimeIndex(dates)
+		month_end = index.is_month_end
+		self.dates = {
+			"MonthEnd": list(dates),
+			"QuarterEnd": list(index[month_end & index.month.isin([3, 6, 9, 12])]),
+			"YearEnd": list(index[month_end & (index.month == 3)]),
+		}
+
+	# Positions in a time scale's dates from start to end (inclusive, either end
+	# open) as a slice, found by bisection
+	def span(self, time_scale, start=None, end=None):
+		dates = self.dates[time_scale]
+		low = 0 if start is None else bisect_left(dates, start)
+		high = len(dates) if end is None else bisect_right(dates, end)
+		return slice(low, high)
+
+	def window(self, time_scale, start=None, end=None):
+		return self.dates[time_scale][self.span(time_scale, start, end)]
@@ -0,0 +1,76 @@
+import copy
+
+import pandas as pd
+
+from india_accounts.partition import append_rows
+
+EXPENDITURE_TYPES = ['All', 'Revenue', 'Capital']
+
+
+# Rows of the ranked line items, with 'Description' ordered by rank so that its
+# category codes are the ranks, sorted the way the chart draws them
+def ranked_rows(df, ranked):
+	rows = df[df['Description'].isin(ranked)].copy()
+	rows['Description'] = rows['Description'].astype(pd.CategoricalDtype(categories=ranked, ordered=True))
+	return rows.sort_values(by=['Date', 'Description'], ascending=[True, False])
+
+
+# Top-N engine for T12_Expenditure. Line items are classified as Revenue or
+# Capital and ranked by BE at the latest date once; each type's rows are kept
+# sorted the way the chart draws them, so any top-N is a slice.
+class ExpenditureRanking:
+	def __init__(self, df):
+		self.df = df
+		# Identify the latest date
+		self.latest = df['Date'].max()
+		latest = df[df['Date'] == self.latest].sort_values(by='BE', ascending=False, kind='stable')
+		self.rankings = {}
+		self.rows = {}
+		for expenditure_type in EXPENDITURE_TYPES:
+			items = latest['Description']
+			if expenditure_type != 'All':
+				items = items[items.str.contains(expenditure_type)]
+			ranked = items.tolist()
+			self.rankings[expenditure_type] = ranked
+			self.rows[expenditure_type] = ranked_rows(df, ranked)
+
+	# Ranking with rows of more dates added. Ranks follow the latest date, so
+	# a delta that moves it re-ranks from the frame in memory; otherwise only
+	# the delta's rows are classified and merged in.
+	def extend(self, delta):
+		df = append_rows(self.df, delta)
+		if delta['Date'].max() > self.latest:
+			return ExpenditureRanking(df)
+		ranking = copy.copy(self)
+		ranking.df = df
+		ranking.rows = {
+			expenditure_type: pd.concat([rows, ranked_rows(delta, self.rankings[expenditure_type])], ignore_index=True).sort_values(by=['Date', 'Description'], ascending=[True, False])
+			for expenditure_type, rows in self.rows.items()
+		}
+		return ranking
+
+	# Frames and rankings that from_parts rebuilds this ranking from, e.g. in
+	# another process
+	def parts(self):
+		frames = {"typed": self.df}
+		frames.update({f"rows-{expenditure_type}": rows for expenditure_type, rows in self.rows.items()})
+		return frames, self.rankings
+
+	@classmethod
+	def from_parts(cls, frames, rankings):
+		ranking = cls.__new__(cls)
+		ranking.df = frames["typed"]
+		ranking.latest = ranking.df['Date'].max()
+		ranking.rankings = rankings
+		ranking.rows = {expenditure_type: frames[f"rows-{expenditure_type}"] for expenditure_type in EXPENDITURE_TYPES}
+		return ranking
+
+	def item_count(self, expenditure_type):
+		return len(self.rankings[expenditure_type])
+
+	# Rows of the top_n line items of a type, sorted by 'Date' and ordered 'Description'
+	def top(self, expenditure_type, top_n):
+		rows = self.rows[expenditure_type]
+		top_rows = rows[rows['Description'].cat.codes < top_n].copy()
+		top_rows['Description'] = top_rows['Description'].cat.set_categories(self.rankings[expenditure_type][:top_n], ordered=True)
+		return top_rows
@@ -0,0 +1,90 @@
+import getpass
+import json
+import logging
+import os
+import stat
+
+import pyarrow as pa
+
+logger = logging.getLogger(__name__)
+
+
+# A private directory in RAM-backed /dev/shm, or "" where there is none
+# (macOS, Windows): decrypted figures must not land in an on-disk temp dir
+def default_shared_dir():
+	if not os.path.isdir("/dev/shm"):
+		return ""
+	return os.path.join("/dev/shm", f"india-accounts-{getpass.getuser()}")
+
+
+# Decoded datasets are published here as uncompressed Arrow IPC files which
+# every worker process on the host memory-maps read-only. The default is RAM
+# backed, so the decrypted figures are never written to disk; without one,
+# sharing is off unless a directory is set explicitly. Set to an empty string
+# to keep every process's data private.
+SHARED_DIR = os.environ.get("INDIA_ACCOUNTS_SHARED_DIR", default_shared_dir())
+ARROW_SUFFIX = ".arrow"
+METADATA_KEY = b"india_accounts"
+
+
+# Create directory if needed and check it is a real directory that only this
+# user can use. The default name is predictable, so another local user could
+# create it first to read the figures or plant files that get mapped as data.
+# Raises PermissionError otherwise.
+def ensure_private_dir(directory):
+	os.makedirs(directory, mode=0o700, exist_ok=True)
+	info = os.lstat(directory)
+	if not stat.S_ISDIR(info.st_mode):
+		raise PermissionError(f"{directory} is not a directory")
+	if hasattr(os, "getuid") and (info.st_uid != os.getuid() or stat.S_IMODE(info.st_mode) != 0o700):
+		raise PermissionError(f"{directory} must be owned by uid {os.getuid()} with mode 0700")
+
+
+# Frames shared between processes through memory-mapped Arrow files. Mapped
+# columns are backed by the page cache, so N workers hold one physical copy.
+class SharedFrames:
+	def __init__(self, directory=SHARED_DIR):
+		self.directory = directory
+		ensure_private_dir(directory)
+
+	def path(self, name):
+		return os.path.join(self.directory, name + ARROW_SUFFIX)
+
+	# Write a frame and its JSON metadata under name. The file is renamed into
+	# place, so readers never map a partial one.
+	def publish(self, name, df, metadata=None):
+		table = pa.Table.from_pandas(df, preserve_index=False)
+		# Keep NaN as NaN rather than null, so float columns map without a copy
+		for i, field in enumerate(table.schema):
+			if pa.types.is_floating(field.type) and table.column(i).null_count:
+				table = table.set_column(i, field, pa.array(df[field.name].to_numpy(), type=field.type, from_pandas=False))
+		if metadata is not None:
+			table = table.replace_schema_metadata({**table.schema.metadata, METADATA_KEY: json.dumps(metadata).encode("utf-8")})
+
+		path = self.path(name)
+		tmp_path = f"{path}.{os.getpid()}.tmp"
+		with open(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'wb') as f:
+			with pa.ipc.new_file(f, table.schema) as writer:
+				writer.write_table(table)
+		os.replace(tmp_path, path)
+
+	# (frame, metadata) mapped from a published file, or None if there is none.
+	# Numeric and date columns are read-only views of the mapping.
+	def open(self, name):
+		try:
+			with pa.memory_map(self.path(name)) as source:
+				table = pa.ipc.open_file(source).read_all()
+		except (FileNotFoundError, pa.ArrowInvalid):
+			return None
+		metadata = table.schema.metadata.get(METADATA_KEY)
+		return table.to_pandas(split_blocks=True), json.loads(metadata) if metadata else None
+
+	# Remove published files starting with prefix except those starting with
+	# keep; processes that already mapped them keep their mapping
+	def prune(self, prefix, keep):
+		for name in os.listdir(self.directory):
+			if name.startswith(prefix) and not name.startswith(keep) and name.endswith(ARROW_SUFFIX):
+				try:
+					os.remove(os.path.join(self.directory, name))
+				except OSError:
+					pass
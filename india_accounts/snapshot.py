@@ -0,0 +1,204 @@
+import base64
+import functools
+import hashlib
+import io
+import os
+
+import pandas as pd
+from cryptography.fernet import Fernet, InvalidToken
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+
+# Decrypted workbooks are kept here as Fernet encrypted parquet files, one per
+# workbook, named after the workbook and a hash of its bytes
+SNAPSHOT_DIR = os.environ.get("INDIA_ACCOUNTS_SNAPSHOT_DIR", ".snapshots")
+SNAPSHOT_SUFFIX = ".parquet.enc"
+
+# Fixed salt so the key is derived once per process rather than once per file
+KEY_SALT = b"india-accounts-snapshot-v1"
+KEY_ITERATIONS = 200_000
+
+
+# Derive the snapshot encryption key from the workbook password
+@functools.lru_cache(maxsize=4)
+def snapshot_cipher(password):
+	kdf = PBKDF2HMAC(algorithm=hashes.SHA256(), length=32, salt=KEY_SALT, iterations=KEY_ITERATIONS)
+	key = base64.urlsafe_b64encode(kdf.derive(password.encode("utf-8")))
+	return Fernet(key)
+
+
+# A workbook read for a version it no longer holds, because the file was
+# replaced after its digest was taken
+class WorkbookChanged(Exception):
+	pass
+
+
+# Hash of the workbook bytes and sheet, used to key its snapshot
+def workbook_digest(path, sheet_name="Sheet1"):
+	digest = hashlib.sha256(sheet_name.encode("utf-8"))
+	with open(path, 'rb') as f:
+		for chunk in iter(lambda: f.read(1 << 20), b""):
+			digest.update(chunk)
+	return digest.hexdigest()
+
+
+def snapshot_path(path, digest, snapshot_dir=SNAPSHOT_DIR):
+	stem = os.path.splitext(os.path.basename(path))[0]
+	return os.path.join(snapshot_dir, f"{stem}-{digest[:16]}{SNAPSHOT_SUFFIX}")
+
+
+# Newest snapshot of any version of a workbook, or None
+def latest_snapshot(path, snapshot_dir=SNAPSHOT_DIR):
+	prefix = os.path.splitext(os.path.basename(path))[0] + "-"
+	try:
+		names = [name for name in os.listdir(snapshot_dir) if name.startswith(prefix) and name.endswith(SNAPSHOT_SUFFIX)]
+	except OSError:
+		return None
+	paths = [os.path.join(snapshot_dir, name) for name in names]
+	return max(paths, key=os.path.getmtime, default=None)
+
+
+# Decrypt a password protected workbook into memory. msoffcrypto is only
+# imported here, so serving from snapshots never loads it. With a digest, the
+# bytes read are checked against it and WorkbookChanged is raised if the file
+# has moved on to another version.
+def decrypt_file(path, password, sheet_name="Sheet1", digest=None):
+	import msoffcrypto
+
+	with open(path, 'rb') as f:
+		data = f.read()
+	if digest is not None and hashlib.sha256(sheet_name.encode("utf-8") + data).hexdigest() != digest:
+		raise WorkbookChanged(f"{path} no longer holds version {digest[:16]}")
+	excel_content = io.BytesIO()
+	excel = msoffcrypto.OfficeFile(io.BytesIO(data))
+	excel.load_key(password)
+	excel.decrypt(excel_content)
+	return excel_content
+
+
+# Decrypt a password protected workbook and parse one sheet
+def decrypt_workbook(path, password, sheet_name="Sheet1", digest=None):
+	excel_content = decrypt_file(path, password, sheet_name, digest)
+
+	# Loading data from excel file
+	return pd.read_excel(excel_content, sheet_name=sheet_name)
+
+
+def read_snapshot(spath, password):
+	try:
+		with open(spath, 'rb') as f:
+			payload = snapshot_cipher(password).decrypt(f.read())
+		return pd.read_parquet(io.BytesIO(payload))
+	except (OSError, InvalidToken, ValueError):
+		# Missing, written with another password or corrupt - rebuild it
+		return None
+
+
+def write_snapshot(df, path, spath, password):
+	try:
+		buffer = io.BytesIO()
+		df.to_parquet(buffer, index=False)
+	except (ValueError, TypeError, ImportError):
+		# Mixed type columns that parquet cannot hold are served uncached
+		return False
+	token = snapshot_cipher(password).encrypt(buffer.getvalue())
+
+	snapshot_dir = os.path.dirname(spath)
+	os.makedirs(snapshot_dir, mode=0o700, exist_ok=True)
+	tmp_path = f"{spath}.{os.getpid()}.tmp"
+	with open(tmp_path, 'wb') as f:
+		f.write(token)
+	os.replace(tmp_path, spath)
+
+	# Drop snapshots of earlier versions of the same workbook
+	prefix = os.path.splitext(os.path.basename(path))[0] + "-"
+	for name in os.listdir(snapshot_dir):
+		stale = os.path.join(snapshot_dir, name)
+		if name.startswith(prefix) and name.endswith(SNAPSHOT_SUFFIX) and stale != spath:
+			try:
+				os.remove(stale)
+			except OSError:
+				pass
+	return True
+
+
+# Load a workbook, going through Excel only when its bytes have changed
+def load_workbook(path, password, sheet_name="Sheet1", snapshot_dir=SNAPSHOT_DIR):
+	digest = workbook_digest(path, sheet_name)
+	spath = snapshot_path(path, digest, snapshot_dir)
+	df = read_snapshot(spath, password)
+	if df is None:
+		df = decrypt_workbook(path, password, sheet_name, digest)
+		write_snapshot(df, path, spath, password)
+	return df
+
+
+# Rows of a workbook whose Date is not in seen_dates, and the rows of the
+# dates that are. Rows are streamed straight into the two frames, so months
+# already held in memory are never run through read_excel again.
+def read_new_rows(path, password, seen_dates, sheet_name="Sheet1", digest=None):
+	import openpyxl
+
+	workbook = openpyxl.load_workbook(decrypt_file(path, password, sheet_name, digest), read_only=True, data_only=True)
+	try:
+		rows = workbook[sheet_name].iter_rows(values_only=True)
+		header = list(next(rows))
+		date_column = header.index("Date")
+		new_rows = []
+		seen_rows = []
+		for row in rows:
+			if row[date_column] in seen_dates:
+				seen_rows.append(row)
+			elif any(value is not None for value in row):
+				new_rows.append(row)
+	finally:
+		workbook.close()
+	return pd.DataFrame(new_rows, columns=header), pd.DataFrame(seen_rows, columns=header)
+
+
+# Whether the rows of known months still hold exactly the known values
+def rows_unchanged(seen, known):
+	if len(seen) != len(known) or list(seen.columns) != list(known.columns):
+		return False
+	try:
+		pd.testing.assert_frame_equal(seen, known.reset_index(drop=True), check_dtype=False, check_exact=True)
+	except AssertionError:
+		return False
+	return True
+
+
+# Load a workbook that may only have gained months since `known`, its raw frame
+# at an earlier version (by default the newest snapshot of it). Only rows of
+# unseen dates are appended. Returns the full frame and the appended rows; the
+# delta is None when the workbook was read in full, either because nothing was
+# known or because the rows of known months were changed rather than added to.
+# Raises WorkbookChanged when the file no longer holds version digest.
+def ingest_workbook(path, password, known=None, sheet_name="Sheet1", snapshot_dir=SNAPSHOT_DIR, digest=None):
+	digest = digest or workbook_digest(path, sheet_name)
+	spath = snapshot_path(path, digest, snapshot_dir)
+	df = read_snapshot(spath, password)
+	if known is None and df is None:
+		previous = latest_snapshot(path, snapshot_dir)
+		known = read_snapshot(previous, password) if previous else None
+	if known is None:
+		if df is None:
+			df = decrypt_workbook(path, password, sheet_name, digest)
+			write_snapshot(df, path, spath, password)
+		return df, None
+
+	seen_dates = set(known['Date'])
+	if df is not None:
+		# Another process already snapshotted this version
+		is_new = ~df['Date'].isin(seen_dates)
+		delta = df[is_new]
+		extended = not delta.empty and rows_unchanged(df[~is_new].reset_index(drop=True), known)
+		return df, delta if extended else None
+
+	delta, seen = read_new_rows(path, password, seen_dates, sheet_name, digest)
+	if not delta.empty and rows_unchanged(seen, known):
+		df = pd.concat([known, delta], ignore_index=True)
+	else:
+		# Known months were revised, not extended
+		df, delta = decrypt_workbook(path, password, sheet_name, digest), None
+	write_snapshot(df, path, spath, password)
+	return df, delta
@@ -0,0 +1,302 @@
+import argparse
+import contextlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+
+import numpy as np
+import pandas as pd
+
+from india_accounts.colors import build_palette
+from india_accounts.config import DATA_DIR, ORDER_LISTS, WORKBOOKS, read_password, workbook_path
+from india_accounts.partition import DateCalendar, build_date_index, build_date_totals
+from india_accounts.ranking import ranked_rows
+from india_accounts.shared import default_shared_dir, ensure_private_dir
+from india_accounts.snapshot import SNAPSHOT_DIR, ingest_workbook, workbook_digest
+from india_accounts.transform import add_derived_columns, apply_schema, prepare_table
+
+# The database holds decrypted figures, so by default it lives next to the
+# shared frames in RAM-backed /dev/shm rather than on disk. Where there is no
+# such directory there is no default, and a path must be given.
+SQLITE_PATH = os.environ.get("INDIA_ACCOUNTS_SQLITE_PATH", default_shared_dir() and os.path.join(default_shared_dir(), "budget.sqlite"))
+
+DATE_FORMAT = "%Y-%m-%d"
+
+# Frames of a view kept after they were queried, and views kept per dataset
+FRAME_CACHE_SIZE = 24
+MAX_VIEWS = 32
+
+
+def table_name(category):
+	return os.path.splitext(WORKBOOKS[category])[0]
+
+
+# Revenue / Capital for each Expenditure line item, as the ranking classifies
+# them by name
+def expenditure_types(descriptions):
+	descriptions = descriptions.astype(str)
+	return np.select([descriptions.str.contains('Revenue'), descriptions.str.contains('Capital')], ['Revenue', 'Capital'], None)
+
+
+# Write one category's typed rows as its table, replacing the previous version
+# in a single transaction so readers see one version or the other
+def write_table(con, category, df, version):
+	table = table_name(category)
+	rows = df.assign(Date=df['Date'].dt.strftime(DATE_FORMAT), Description=df['Description'].astype(object))
+	if category == "Expenditure Details":
+		rows['expenditure_type'] = expenditure_types(df['Description'])
+	columns = ", ".join(f'"{column}" {"REAL" if pd.api.types.is_numeric_dtype(rows[column]) else "TEXT"}' for column in rows.columns)
+	values = rows.astype(object).where(rows.notna(), None).itertuples(index=False, name=None)
+
+	con.execute("BEGIN IMMEDIATE")
+	try:
+		con.execute(f'DROP TABLE IF EXISTS "{table}"')
+		con.execute(f'CREATE TABLE "{table}" ({columns})')
+		con.executemany(f'INSERT INTO "{table}" VALUES ({", ".join("?" * len(rows.columns))})', values)
+		con.execute(f'CREATE INDEX "{table}_date" ON "{table}" (Date)')
+		con.execute(f'CREATE INDEX "{table}_description" ON "{table}" (Description)')
+		con.execute(f'CREATE INDEX "{table}_date_description" ON "{table}" (Date, Description)')
+		if category == "Expenditure Details":
+			con.execute(f'CREATE INDEX "{table}_type_date" ON "{table}" (expenditure_type, Date)')
+		con.execute("INSERT OR REPLACE INTO workbooks VALUES (?, ?, ?, ?, ?)", (category, table, version, len(rows), time.time()))
+		con.execute("COMMIT")
+	except BaseException:
+		con.execute("ROLLBACK")
+		raise
+
+
+# Ingest every workbook into the database at db_path, skipping those whose
+# version is already there. Returns {category: "written" | "current"}.
+def build_database(password, db_path=SQLITE_PATH, data_dir=None, snapshot_dir=SNAPSHOT_DIR, categories=None):
+	if not db_path:
+		raise ValueError("no RAM-backed directory for the database; pass db_path or set INDIA_ACCOUNTS_SQLITE_PATH")
+	directory = os.path.dirname(db_path) or "."
+	if directory == default_shared_dir():
+		ensure_private_dir(directory)
+	else:
+		os.makedirs(directory, mode=0o700, exist_ok=True)
+	os.close(os.open(db_path, os.O_WRONLY | os.O_CREAT, 0o600))
+	status = {}
+	with contextlib.closing(sqlite3.connect(db_path, isolation_level=None)) as con:
+		con.execute("PRAGMA journal_mode=WAL")
+		con.execute("CREATE TABLE IF NOT EXISTS workbooks (category TEXT PRIMARY KEY, table_name TEXT, version TEXT, rows INTEGER, ingested_at REAL)")
+		versions = dict(con.execute("SELECT category, version FROM workbooks"))
+		for category in categories or WORKBOOKS:
+			path = workbook_path(category, data_dir)
+			digest = workbook_digest(path)
+			if versions.get(category) == digest:
+				status[category] = "current"
+				continue
+			raw, _ = ingest_workbook(path, password, snapshot_dir=snapshot_dir, digest=digest)
+			write_table(con, category, apply_schema(raw.copy(), category, ORDER_LISTS[category]), digest)
+			status[category] = "written"
+	return status
+
+
+# Read-only queries over a database written by build_database. Every filter
+# is an indexed lookup, so only the rows asked for are ever loaded: a date's
+# frame, a top-N ranking, one line item's history. Frames come back derived
+# and ordered exactly as the app draws them.
+class SqlStore:
+	def __init__(self, db_path=SQLITE_PATH):
+		self._datasets = {}
+		self._lock = threading.Lock()
+		if not db_path:
+			raise ValueError("no RAM-backed directory for the database; pass db_path or set INDIA_ACCOUNTS_SQLITE_PATH")
+		if os.path.dirname(db_path) == default_shared_dir():
+			# Not a database another user planted under the predictable name
+			ensure_private_dir(os.path.dirname(db_path))
+		self.db_path = db_path
+
+	def connect(self):
+		return contextlib.closing(sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True))
+
+	def version(self, category):
+		with self.connect() as con:
+			row = con.execute("SELECT version FROM workbooks WHERE category = ?", (category,)).fetchone()
+		if row is None:
+			raise KeyError(f"{category!r} has not been ingested into {self.db_path}")
+		return row[0]
+
+	def dates(self, category):
+		with self.connect() as con:
+			rows = con.execute(f'SELECT DISTINCT Date FROM "{table_name(category)}" ORDER BY Date').fetchall()
+		return [pd.Timestamp(date) for date, in rows]
+
+	# Typed rows (as apply_schema leaves them) matching the given filters
+	def rows(self, category, dates=None, start=None, end=None, descriptions=None):
+		table = table_name(category)
+		where, params = [], []
+		if dates is not None:
+			where.append(f"Date IN ({', '.join('?' * len(dates))})")
+			params += [pd.Timestamp(date).strftime(DATE_FORMAT) for date in dates]
+		if start is not None:
+			where.append("Date >= ?")
+			params.append(pd.Timestamp(start).strftime(DATE_FORMAT))
+		if end is not None:
+			where.append("Date <= ?")
+			params.append(pd.Timestamp(end).strftime(DATE_FORMAT))
+		if descriptions is not None:
+			where.append(f"Description IN ({', '.join('?' * len(descriptions))})")
+			params += list(descriptions)
+		sql = f'SELECT * FROM "{table}"' + (f" WHERE {' AND '.join(where)}" if where else "") + " ORDER BY rowid"
+		with self.connect() as con:
+			df = pd.read_sql_query(sql, con, params=params)
+		df = df.drop(columns=['expenditure_type'], errors='ignore')
+		df['Date'] = pd.to_datetime(df['Date'], format=DATE_FORMAT)
+		cat_order_list = ORDER_LISTS[category]
+		if cat_order_list is not None:
+			df['Description'] = pd.Categorical(df['Description'], categories=cat_order_list, ordered=True)
+		else:
+			df['Description'] = df['Description'].astype('category')
+		return df
+
+	# Expenditure line items of a type ranked by BE at the latest date, as
+	# ExpenditureRanking ranks them
+	def ranking(self, selected_type='All', top_n=None):
+		table = table_name("Expenditure Details")
+		sql = f'SELECT Description FROM "{table}" WHERE Date = (SELECT MAX(Date) FROM "{table}")'
+		params = []
+		if selected_type != 'All':
+			sql += " AND expenditure_type = ?"
+			params.append(selected_type)
+		sql += " ORDER BY BE DESC, rowid"
+		if top_n is not None:
+			sql += " LIMIT ?"
+			params.append(top_n)
+		with self.connect() as con:
+			return [description for description, in con.execute(sql, params)]
+
+	def _derive(self, category, df, ranked=None):
+		if ranked is not None:
+			df = ranked_rows(df, ranked)
+		else:
+			df = prepare_table(df)
+		return add_derived_columns(df, category)
+
+	# Chart-ready rows and axes of a category (a type's top_n for Expenditure
+	# Details) over all dates, as DatasetView.df and .axes hold them
+	def view(self, category, selected_type='All', top_n=15):
+		ranked = self.ranking(selected_type, top_n) if category == "Expenditure Details" else None
+		df = self.rows(category, descriptions=ranked)
+		return self._derive(category, df, ranked)
+
+	# Chart-ready rows of one date with their year-over-year columns, read
+	# together with the same month a year earlier
+	def frame(self, category, date, selected_type='All', top_n=15):
+		date = pd.Timestamp(date)
+		year_earlier = date - pd.DateOffset(years=1) + pd.offsets.MonthEnd(0)
+		ranked = self.ranking(selected_type, top_n) if category == "Expenditure Details" else None
+		df = self.rows(category, dates=[year_earlier, date], descriptions=ranked)
+		df, _ = self._derive(category, df, ranked)
+		return df[df['Date'] == date]
+
+	# One line item's typed rows over all dates
+	def series(self, category, description):
+		return self.rows(category, descriptions=[description])
+
+	# Dataset of a category at the version now in the database, in the shape
+	# DataStore.get returns. A rebuilt database is picked up on the next call.
+	def get(self, category):
+		version = self.version(category)
+		with self._lock:
+			dataset = self._datasets.get(category)
+			if dataset is None or dataset.version != version:
+				dataset = self._datasets[category] = SqlDataset(self, category, version)
+		return dataset
+
+
+# A category at one database version, standing in for a CategoryDataset
+class SqlDataset:
+	def __init__(self, store, category, version):
+		self.store = store
+		self.category = category
+		self.version = version
+		self._views = OrderedDict()
+		self._lock = threading.Lock()
+
+	def item_count(self, selected_type):
+		return len(self.store.ranking(selected_type))
+
+	def view(self, selected_type='All', top_n=15):
+		key = (selected_type, top_n) if self.category == "Expenditure Details" else ()
+		with self._lock:
+			view = self._views.get(key)
+			if view is None:
+				view = self._views[key] = SqlView(self.store, self.category, *key)
+				while len(self._views) > MAX_VIEWS:
+					self._views.popitem(last=False)
+			else:
+				self._views.move_to_end(key)
+		return view
+
+
+# Stand-in for a DatasetView that holds no rows. Dates, axes, totals and
+# palette are taken from one pass over the view's rows, which are then
+# dropped; each date's rows are queried when drawn and only the most recent
+# FRAME_CACHE_SIZE are kept.
+class SqlView:
+	def __init__(self, store, category, selected_type='All', top_n=15):
+		df, self.axes = store.view(category, selected_type, top_n)
+		self.dates = list(build_date_index(df))
+		self.calendar = DateCalendar(self.dates)
+		self.totals_by_date = build_date_totals(df)
+		self.palette = build_palette(df['Description'])
+		self.frames_by_date = SqlFrames(store, category, self.dates, selected_type, top_n)
+
+
+# Date -> rows of that date, queried on first use
+class SqlFrames(Mapping):
+	def __init__(self, store, category, dates, selected_type='All', top_n=15, size=FRAME_CACHE_SIZE):
+		self.store = store
+		self.category = category
+		self.dates = dates
+		self.selected_type = selected_type
+		self.top_n = top_n
+		self.size = size
+		self._known = set(dates)
+		self._frames = OrderedDict()
+		self._lock = threading.Lock()
+
+	def __getitem__(self, date):
+		if date not in self._known:
+			raise KeyError(date)
+		with self._lock:
+			frame = self._frames.get(date)
+			if frame is not None:
+				self._frames.move_to_end(date)
+				return frame
+		frame = self.store.frame(self.category, date, self.selected_type, self.top_n)
+		with self._lock:
+			self._frames[date] = frame
+			while len(self._frames) > self.size:
+				self._frames.popitem(last=False)
+		return frame
+
+	def __iter__(self):
+		return iter(self.dates)
+
+	def __len__(self):
+		return len(self.dates)
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Ingest the budget workbooks into an indexed SQLite database")
+	parser.add_argument("--db", default=SQLITE_PATH, required=not SQLITE_PATH, help="database file (default: RAM-backed shared directory)")
+	parser.add_argument("--categories", nargs="+", default=list(WORKBOOKS), choices=list(WORKBOOKS), metavar="CATEGORY")
+	parser.add_argument("--data-dir", default=DATA_DIR)
+	parser.add_argument("--snapshot-dir", default=SNAPSHOT_DIR)
+	args = parser.parse_args()
+
+	start = time.perf_counter()
+	status = build_database(read_password(), args.db, args.data_dir, args.snapshot_dir, args.categories)
+	for category, state in status.items():
+		print(f"{category:<20} {state}")
+	print(f"wrote {args.db} in {time.perf_counter() - start:.3f}s")
+
+
+if __name__ == "__main__":
+	main()
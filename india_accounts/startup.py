@@ -0,0 +1,102 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+# What india-budget.py imports before it draws anything
+APP_IMPORTS = [
+	"pandas",
+	"streamlit",
+	"india_accounts.config",
+	"india_accounts.dataset",
+	"india_accounts.figcache",
+	"india_accounts.figures",
+	"india_accounts.timing",
+	"india_accounts.titles",
+	"india_accounts.warmup",
+	"india_accounts.watcher",
+]
+
+# Only needed on a snapshot miss or by the offline tools, so app startup must
+# not load them
+DEFERRED_PACKAGES = ["msoffcrypto", "openpyxl", "matplotlib", "plotly.express", "seaborn"]
+
+# Median cold import of APP_IMPORTS above which the report fails
+STARTUP_BUDGET_MS = float(os.environ.get("INDIA_ACCOUNTS_STARTUP_BUDGET_MS", "1500"))
+
+PROBE = "import sys, json{imports}; print(json.dumps(sorted(sys.modules)))"
+
+
+# One cold interpreter importing modules under -X importtime: the wall time,
+# every module's (self, cumulative) microseconds and the modules left loaded
+def import_profile(modules):
+	env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [os.getcwd(), os.environ.get("PYTHONPATH")])))
+	start = time.perf_counter()
+	result = subprocess.run([sys.executable, "-X", "importtime", "-c", PROBE.format(imports="".join(", " + module for module in modules))],
+		capture_output=True, text=True, check=True, env=env)
+	wall = time.perf_counter() - start
+
+	# "import time:       self [us] |  cumulative | imported package", nested
+	# imports indented under the package that pulled them in
+	times = {}
+	for line in result.stderr.splitlines():
+		if not line.startswith("import time:") or "[us]" in line:
+			continue
+		self_us, cumulative_us, name = line[len("import time:"):].split("|")
+		times[name.strip()] = (int(self_us), int(cumulative_us), len(name) - len(name.lstrip()) - 1)
+	return wall, times, json.loads(result.stdout)
+
+
+# Import-time report of the app's startup imports over `repeat` cold starts,
+# with the heaviest top-level packages and any deferred package that loaded.
+# What a bare interpreter imports on its own (site, encodings) is left out.
+def startup_report(modules=APP_IMPORTS, repeat=5, top=15):
+	_, bare, _ = import_profile([])
+	walls = []
+	totals = []
+	for _ in range(repeat):
+		wall, times, loaded = import_profile(modules)
+		walls.append(wall)
+		top_level = {name: cumulative for name, (_, cumulative, depth) in times.items() if depth == 0 and name not in bare}
+		totals.append(sum(top_level.values()))
+	heaviest = sorted(top_level.items(), key=lambda item: item[1], reverse=True)[:top]
+	return {
+		"modules": modules,
+		"runs": repeat,
+		"imports_ms": round(float(np.median(totals)) / 1000, 1),
+		"interpreter_ms": round(float(np.median(walls)) * 1000, 1),
+		"heaviest": [{"module": name, "cumulative_ms": round(us / 1000, 1)} for name, us in heaviest],
+		"module_count": len(loaded),
+		"deferred_loaded": [name for name in DEFERRED_PACKAGES if name in loaded],
+	}
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Report the app's cold-start import time and check it against a budget")
+	parser.add_argument("--repeat", type=int, default=5, help="cold interpreters to time (the median is reported)")
+	parser.add_argument("--top", type=int, default=15, help="heaviest top-level imports to list")
+	parser.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS)
+	parser.add_argument("--json", action="store_true", help="print the report as JSON")
+	args = parser.parse_args()
+
+	report = startup_report(repeat=args.repeat, top=args.top)
+	report["budget_ms"] = args.budget_ms
+	if args.json:
+		print(json.dumps(report, indent=1))
+	else:
+		for row in report["heaviest"]:
+			print(f'{row["module"]:<40} {row["cumulative_ms"]:>8.1f}ms')
+		print(f'imports {report["imports_ms"]:.1f}ms (interpreter {report["interpreter_ms"]:.1f}ms, {report["module_count"]} modules), budget {args.budget_ms:.0f}ms')
+		if report["deferred_loaded"]:
+			print(f'loaded at startup but meant to be deferred: {", ".join(report["deferred_loaded"])}')
+
+	if report["imports_ms"] > args.budget_ms or report["deferred_loaded"]:
+		sys.exit(1)
+
+
+if __name__ == "__main__":
+	main()
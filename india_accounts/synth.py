@@ -0,0 +1,128 @@
+import argparse
+import io
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from msoffcrypto.format.ooxml import OOXMLFile
+
+from india_accounts.config import ORDER_LISTS, WORKBOOKS, read_password
+
+# dd/mm/yy only round-trips for 1969-2068
+FIRST_YEAR = 1969
+LAST_YEAR = 2068
+
+# Typical size of a line item in Rs Cr, per category
+ITEM_SCALE = {
+	"Account Summary": 1_000_000,
+	"Tax Details": 300_000,
+	"NonTax Details": 50_000,
+	"NonDebt Details": 20_000,
+	"Expenditure Details": 5_000,
+	"Subsidy Details": 100_000,
+	"Financing Details": 200_000,
+}
+
+MINISTRIES = [
+	"Defence", "Road Transport and Highways", "Railways", "Consumer Affairs Food and Public Distribution",
+	"Home Affairs", "Rural Development", "Chemicals and Fertilisers", "Agriculture and Farmers Welfare",
+	"Communications", "Education", "Health and Family Welfare", "Jal Shakti", "Housing and Urban Affairs",
+	"Petroleum and Natural Gas", "Finance", "External Affairs", "Power", "Science and Technology",
+]
+
+
+# Expenditure line items, each tagged Revenue or Capital like T12_Expenditure
+def expenditure_items(count, rng):
+	kinds = rng.choice(["Revenue", "Capital"], size=count, p=[0.7, 0.3])
+	ministries = rng.choice(MINISTRIES, size=count)
+	return [f"{kind} - {ministry} - Head {i + 1:04d}" for i, (kind, ministry) in enumerate(zip(kinds, ministries))]
+
+
+# Month-end dates from April of start_year for `months` months
+def month_ends(start_year, months):
+	return pd.date_range(f"{start_year}-04-30", periods=months, freq="ME")
+
+
+# One table shaped like the app's workbooks: a BE per line item and fiscal
+# year, a cumulative Actual that builds up towards it month by month, and
+# the year's nominal GDP. Tax Details also gets Month_Cum_Year_CY.
+def synth_table(category, dates, descriptions, rng):
+	month = dates.month.to_numpy()
+	fiscal_year = np.where(month < 4, dates.year - 1, dates.year)
+	fy_index = fiscal_year - fiscal_year[0]
+	month_in_fy = (month - 4) % 12 + 1
+	num_years = fy_index[-1] + 1
+
+	# BE grows about 8% a year per line item, with budget-to-budget noise
+	base = rng.lognormal(mean=np.log(ITEM_SCALE[category]), sigma=1.0, size=len(descriptions))
+	growth = 1.08 ** np.arange(num_years)[:, None] * rng.uniform(0.9, 1.1, size=(num_years, len(descriptions)))
+	be = base[None, :] * growth
+
+	# Actual reaches 85-110% of BE by March, following a convex spend curve
+	outturn = rng.uniform(0.85, 1.1, size=(num_years, len(descriptions)))
+	progress = (month_in_fy / 12.0) ** 1.3
+	actual = be[fy_index] * outturn[fy_index] * progress[:, None] * rng.uniform(0.95, 1.05, size=(len(dates), len(descriptions)))
+
+	gdp = 2e7 * 1.1 ** np.arange(num_years)
+
+	table = pd.DataFrame({
+		"Date": np.repeat(dates.strftime("%d/%m/%y"), len(descriptions)),
+		"Description": np.tile(descriptions, len(dates)),
+		"BE": be[fy_index].ravel().round(2),
+		"Actual": actual.ravel().round(2),
+		"GDP_Current": np.repeat(gdp[fy_index], len(descriptions)).round(2),
+	})
+	if category == "Tax Details":
+		table["Month_Cum_Year_CY"] = table["Actual"]
+	return table
+
+
+# Write a table as a password protected workbook the app can decrypt
+def write_encrypted_workbook(table, path, password):
+	plain = io.BytesIO()
+	table.to_excel(plain, sheet_name="Sheet1", index=False)
+	plain.seek(0)
+	with open(path, 'wb') as f:
+		OOXMLFile(plain).encrypt(password, f)
+
+
+def generate(output_dir, password, start_year, months, expenditure_count, seed, categories=None):
+	os.makedirs(output_dir, exist_ok=True)
+	dates = month_ends(start_year, months)
+	written = []
+	for category in categories or WORKBOOKS:
+		# Seeded per workbook so each one is reproducible on its own
+		rng = np.random.default_rng([seed, list(WORKBOOKS).index(category)])
+		descriptions = ORDER_LISTS[category] or expenditure_items(expenditure_count, rng)
+		table = synth_table(category, dates, descriptions, rng)
+		path = os.path.join(output_dir, WORKBOOKS[category])
+		write_encrypted_workbook(table, path, password)
+		written.append((path, len(table)))
+	return written
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Generate encrypted workbooks shaped like the budget data, for scale testing")
+	parser.add_argument("--output-dir", default="synthetic")
+	parser.add_argument("--start-year", type=int, default=1995, help="fiscal year of the first month (April)")
+	parser.add_argument("--months", type=int, default=360)
+	parser.add_argument("--expenditure-items", type=int, default=1000)
+	parser.add_argument("--seed", type=int, default=0)
+	parser.add_argument("--categories", nargs="+", choices=list(WORKBOOKS), metavar="CATEGORY")
+	parser.add_argument("--password", help="workbook password (default: DB_PASSWORD or .streamlit/secrets.toml)")
+	args = parser.parse_args()
+
+	last_year = args.start_year + (args.months + 2) // 12
+	if args.start_year < FIRST_YEAR or last_year > LAST_YEAR:
+		parser.error(f"dates must fall within {FIRST_YEAR}-{LAST_YEAR} to survive the dd/mm/yy format")
+
+	start = time.perf_counter()
+	written = generate(args.output_dir, args.password or read_password(), args.start_year, args.months, args.expenditure_items, args.seed, args.categories)
+	for path, rows in written:
+		print(f"{path:<40} {rows:>9} rows")
+	print(f"total {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,77 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+# Samples kept per stage; older ones roll off
+DEFAULT_WINDOW = 1000
+
+
+# Rolling latency histograms, one per stage. Thread-safe so a single instance
+# can collect the timings of every session in the process.
+class StageTimings:
+	def __init__(self, window=DEFAULT_WINDOW):
+		self.window = window
+		self._samples = {}
+		self._lock = threading.Lock()
+
+	def record(self, stage, seconds):
+		with self._lock:
+			if stage not in self._samples:
+				self._samples[stage] = deque(maxlen=self.window)
+			self._samples[stage].append(seconds)
+
+	def summary(self):
+		with self._lock:
+			samples = {stage: np.array(values) * 1000 for stage, values in self._samples.items()}
+		return {
+			stage: {
+				"count": len(ms),
+				"mean_ms": round(float(ms.mean()), 2),
+				"p50_ms": round(float(np.percentile(ms, 50)), 2),
+				"p90_ms": round(float(np.percentile(ms, 90)), 2),
+				"p99_ms": round(float(np.percentile(ms, 99)), 2),
+				"max_ms": round(float(ms.max()), 2),
+			}
+			for stage, ms in samples.items()
+		}
+
+
+# Timings of one script run. Every timed block is recorded straight into the
+# given StageTimings, and totals per stage are kept for the run's log line.
+# Idle blocks (the pause between animation frames) are left out of the total.
+class RunTimer:
+	def __init__(self, *sinks):
+		self.sinks = sinks
+		self.started = time.perf_counter()
+		self.totals = {}
+		self.idle_seconds = 0
+
+	@contextmanager
+	def stage(self, name):
+		start = time.perf_counter()
+		try:
+			yield
+		finally:
+			self.record(name, time.perf_counter() - start)
+
+	@contextmanager
+	def idle(self):
+		start = time.perf_counter()
+		try:
+			yield
+		finally:
+			self.idle_seconds += time.perf_counter() - start
+
+	def record(self, name, seconds):
+		self.totals[name] = self.totals.get(name, 0) + seconds
+		for sink in self.sinks:
+			sink.record(name, seconds)
+
+	# Close the run: record its busy time under "rerun" and return the
+	# structured log record, extra fields first
+	def finish(self, **fields):
+		self.record("rerun", time.perf_counter() - self.started - self.idle_seconds)
+		return dict(fields, stages_ms={stage: round(seconds * 1000, 2) for stage, seconds in self.totals.items()}, idle_ms=round(self.idle_seconds * 1000, 2))
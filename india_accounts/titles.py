@@ -0,0 +1,44 @@
+from datetime import datetime
+
+
+def get_financial_year(date):
+	year = date.year
+	if date.month < 4:
+		year -= 1
+	return f'FY{year % 100:02d}-{(year + 1) % 100:02d}'
+
+
+# Page title for a category and date; Expenditure Details also shows that
+# date's BE and Actual totals
+def get_title(selected_date, selected_category, totals_by_date=None):
+	# Convert the selected_date to a datetime object if it isn't one already
+	if isinstance(selected_date, str):
+		selected_date = datetime.strptime(selected_date, '%Y-%m-%d').date()
+	
+	# Get the financial year string
+	fy = get_financial_year(selected_date)
+	
+	# Format the date correctly with ordinal suffix
+	day_suffix = lambda n: 'th' if 11 <= n <= 13 else {1: 'st', 2: 'nd', 3: 'rd'}.get(n % 10, 'th')
+	formatted_date = selected_date.strftime(f'%b {selected_date.day}{day_suffix(selected_date.day)}, %Y')
+
+	if selected_category == "Expenditure Details":
+		# Prepare the title with financial year, formatted date, and total values
+		total_be, total_actual = totals_by_date[selected_date]
+		title = f"Central Govt's Expenditure Details For <span style='color:blue;'>{fy}</span> - <span style='color:red;'>{formatted_date}</span> - Total BE: Rs <span style='color:green;'>{total_be} Lakh Cr</span>, Total Actual: Rs <span style='color:orange;'>{total_actual} Lakh Cr</span>"
+	else:
+		# Prepare the title with financial year and formatted date for other categories
+		if selected_category == "Account Summary":
+			title = f"Central Govt's Account Summary For <span style='color:blue;'>{fy}</span> - <span style='color:red;'>{formatted_date}</span>"
+		elif selected_category == "Tax Details":
+			title = f"Central Govt's Tax Collection Details <span style='color:blue;'>{fy}</span> - <span style='color:red;'>{formatted_date}</span>"
+		elif selected_category == "NonTax Details":
+			title = f"Central Govt's Non Tax Collection Details <span style='color:blue;'>{fy}</span> - <span style='color:red;'>{formatted_date}</span>"
+		elif selected_category == "NonDebt Details":
+			title = f"Central Govt's Non Debt Collection Details <span style='color:blue;'>{fy}</span> - <span style='color:red;'>{formatted_date}</span>"
+		elif selected_category == "Financing Details":
+			title = f"Central Govt's Deficit Financing Details <span style='color:blue;'>{fy}</span> - <span style='color:red;'>{formatted_date}</span>"
+		elif selected_category == "Subsidy Details":
+			title = f"Central Govt's Subsidy Details <span style='color:blue;'>{fy}</span> - <span style='color:red;'>{formatted_date}</span>"
+
+	return title
@@ -0,0 +1,177 @@
+import numpy as np
+import pandas as pd
+
+from india_accounts.ranking import ExpenditureRanking
+
+# Categories drawn as BE vs Actual bars; Tax Details is drawn from the cumulative tax columns
+BE_ACTUAL_CATEGORIES = ["Account Summary", "NonTax Details", "NonDebt Details", "Expenditure Details", "Subsidy Details", "Financing Details"]
+
+# Measure column types per table, applied once at ingest. Workbook figures are
+# in Rs Cr and feed every ratio, so they keep float64.
+MEASURE_SCHEMA = {"BE": "float64", "Actual": "float64", "GDP_Current": "float64"}
+TABLE_SCHEMAS = {category: MEASURE_SCHEMA for category in BE_ACTUAL_CATEGORIES}
+TABLE_SCHEMAS["Tax Details"] = dict(MEASURE_SCHEMA, Month_Cum_Year_CY="float64")
+
+# Derived columns are rounded to 2 decimals for display, well within float32
+BE_ACTUAL_DERIVED_SCHEMA = {
+	"Actual % of BE": "float32",
+	"Actual": "float32",
+	"BE": "float32",
+	"GDP_Current": "float32",
+	"Actual % of GDP": "float32",
+	"BE % of GDP": "float32",
+}
+TAX_DERIVED_SCHEMA = {"Tax Cum Value": "float32", "Tax Cum Value % of GDP": "float32"}
+
+# Drawn measures compared with the same month of the previous financial year
+YOY_COLUMNS = {category: ["BE", "Actual", "BE % of GDP", "Actual % of GDP"] for category in BE_ACTUAL_CATEGORIES}
+YOY_COLUMNS["Tax Details"] = ["Tax Cum Value", "Tax Cum Value % of GDP"]
+
+
+# Typed frame for a raw workbook: datetime64 dates, categorical descriptions
+# (ordered by cat_order_list when the category has one) and float measures
+def apply_schema(df, selected_category, cat_order_list=None):
+	# Convert 'Date' column to datetime
+	df['Date'] = pd.to_datetime(df['Date'], format='%d/%m/%y')
+	if cat_order_list is not None:
+		# Convert 'Description' to a categorical type for sorting
+		df['Description'] = pd.Categorical(df['Description'].str.strip(), categories=cat_order_list, ordered=True)
+	else:
+		df['Description'] = df['Description'].astype('category')
+	measures = {column: dtype for column, dtype in TABLE_SCHEMAS[selected_category].items() if column in df}
+	return df.astype(measures)
+
+
+# Order rows of a fixed-list category
+def prepare_table(df):
+	# Sort the DataFrame by 'Date' (newest first) and 'Description'
+	df = df.sort_values(by=['Date', 'Description'], ascending=[True, False])
+	return df
+
+
+# Expenditure line items of one type ('All', 'Revenue' or 'Capital'), limited
+# to the top_n by BE at the latest date
+def sort_and_filter_dataframe(df, category, top_n):
+	return ExpenditureRanking(df).top(category, top_n)
+
+
+# Hand-picked Expenditure line items, each date's bars ordered by BE. Only the
+# picked items stay categories, so the palette spreads its hues over them.
+def select_items(df, items, selected_category="Expenditure Details"):
+	df = df[df['Description'].isin(items)].sort_values(by=['Date', 'BE'], ascending=[True, True])
+	df = df.assign(Description=df['Description'].cat.remove_unused_categories())
+	return add_derived_columns(df, selected_category)
+
+
+# Rs Lakh Cr and % of GDP columns and their year-over-year changes, plus the
+# x-axis ranges and titles that stay fixed for the whole animation
+def add_derived_columns(df, selected_category):
+	# Growth is taken before the figures are rounded for display
+	measures = yoy_measures(df, selected_category)
+	if selected_category in BE_ACTUAL_CATEGORIES:
+		df["Actual % of BE"] = ((df["Actual"]/df["BE"])*100).round(2)
+		df["Actual"] = (df["Actual"]/100000).round(2) #converting into Rs Lakh Cr
+		df["BE"] = (df["BE"]/100000).round(2) #converting into Rs Lakh Cr
+		df["GDP_Current"] = (df["GDP_Current"]/100000).round(2) #converting into Rs Lakh Cr
+		df["Actual % of GDP"] = ((df["Actual"]/df["GDP_Current"])*100).round(2)
+		df["BE % of GDP"] = ((df["BE"]/df["GDP_Current"])*100).round(2)
+		axes = {
+			"fig2_xaxis_min_value": df['Actual % of GDP'].min(),
+			"fig2_xaxis_max_value": df['Actual % of GDP'].max(),
+			"fig1_xaxis_min_value": df['BE'].min(),
+			"fig1_xaxis_max_value": df['BE'].max(),
+			"xaxis1_title": 'Absolute Values Rs Lakh Cr (Top Bar - Actuals, Bottom Bar - BE)',
+			"xaxis2_title": 'Values % of GDP',
+		}
+		df = df.astype(BE_ACTUAL_DERIVED_SCHEMA)
+
+	if selected_category == "Tax Details":
+		df["Tax Cum Value"] = (df["Month_Cum_Year_CY"]/100000).round(2) #converting into Rs Lakh Cr
+		df["Tax Cum Value % of GDP"] = ((df["Month_Cum_Year_CY"]/df["GDP_Current"])*100).round(2)
+		axes = {
+			"fig2_xaxis_min_value": df['Tax Cum Value % of GDP'].min(),
+			"fig2_xaxis_max_value": df['Tax Cum Value % of GDP'].max(),
+			"fig1_xaxis_min_value": df["Tax Cum Value"].min(),
+			"fig1_xaxis_max_value": df["Tax Cum Value"].max(),
+			"xaxis1_title": 'Tax Cum Value Rs Lakh Cr',
+			"xaxis2_title": 'Tax Cum Value % of GDP',
+		}
+		df = df.astype(TAX_DERIVED_SCHEMA)
+
+	return add_yoy_columns(df, measures), axes
+
+
+# Axis ranges of a table from those of two parts of it
+def merge_axes(axes, delta_axes):
+	merged = dict(axes)
+	for key, value in delta_axes.items():
+		if key.endswith("_min_value"):
+			merged[key] = np.fmin(axes[key], value)
+		elif key.endswith("_max_value"):
+			merged[key] = np.fmax(axes[key], value)
+	return merged
+
+
+# Exact figures behind each of a category's YOY_COLUMNS, in the units they are
+# drawn in: the Rs Cr measures scaled to Lakh Cr but not rounded, and % of GDP
+# from those
+def yoy_measures(df, selected_category):
+	if selected_category == "Tax Details":
+		tax = df["Month_Cum_Year_CY"].to_numpy('float64')
+		measures = [tax/100000, tax/df["GDP_Current"].to_numpy('float64')*100]
+	else:
+		be, actual, gdp = (df[column].to_numpy('float64') for column in ["BE", "Actual", "GDP_Current"])
+		measures = [be/100000, actual/100000, be/gdp*100, actual/gdp*100]
+	return dict(zip(YOY_COLUMNS[selected_category], measures))
+
+
+# "<column> YoY" (change) and "<column> YoY %" (growth) of each measure against
+# the same description in the same month a year earlier, found for all rows at
+# once by matching (description, month number) keys; NaN where that month is
+# missing. Months are matched rather than dates, as February ends vary.
+# measures holds each column's exact values, aligned with the rows of df.
+def add_yoy_columns(df, measures):
+	months = df['Date'].dt.year.to_numpy() * 12 + df['Date'].dt.month.to_numpy()
+	codes = df['Description'].cat.codes.to_numpy()
+	keys = pd.MultiIndex.from_arrays([codes, months])
+	first = ~keys.duplicated()
+	positions = keys[first].get_indexer(pd.MultiIndex.from_arrays([codes, months - 12]))
+	found = positions >= 0
+	previous = np.flatnonzero(first)[positions]
+	yoy = {}
+	for column, values in measures.items():
+		last_year = np.where(found, values[previous], np.nan)
+		with np.errstate(divide='ignore', invalid='ignore'):
+			growth = np.where(last_year != 0, (values / last_year - 1) * 100, np.nan)
+		yoy[f"{column} YoY"] = np.round(values - last_year, 2).astype('float32')
+		yoy[f"{column} YoY %"] = np.round(growth, 2).astype('float32')
+	return df.assign(**yoy)
+
+
+# Year-over-year columns of every row of a typed table, keyed by date and
+# description, for views that only derived some of its rows
+def yoy_table(df, selected_category):
+	return add_yoy_columns(df[['Date', 'Description']], yoy_measures(df, selected_category))
+
+
+# df with its year-over-year columns looked up in a yoy_table
+def copy_yoy_columns(df, table):
+	keys = pd.MultiIndex.from_arrays([table['Date'], table['Description'].astype(str)])
+	first = ~keys.duplicated()
+	positions = keys[first].get_indexer(pd.MultiIndex.from_arrays([df['Date'], df['Description'].astype(str)]))
+	found = positions >= 0
+	rows = np.flatnonzero(first)[positions]
+	yoy = {}
+	for column in table.columns.drop(['Date', 'Description']):
+		yoy[column] = np.where(found, table[column].to_numpy()[rows], np.nan).astype('float32')
+	return df.assign(**yoy)
+
+
+# Whole ingest-and-derive step for one category: raw workbook in, chart-ready frame out
+def transform_table(df, selected_category, cat_order_list=None, selected_type='All', top_n=15):
+	df = apply_schema(df, selected_category, cat_order_list)
+	if selected_category == "Expenditure Details":
+		df = sort_and_filter_dataframe(df, selected_type, top_n)
+	else:
+		df = prepare_table(df)
+	return add_derived_columns(df, selected_category)
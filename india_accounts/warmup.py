@@ -0,0 +1,120 @@
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from india_accounts.config import WORKBOOKS, read_password, workbook_path
+from india_accounts.snapshot import SNAPSHOT_DIR, ingest_workbook, snapshot_path, workbook_digest
+
+logger = logging.getLogger(__name__)
+
+
+# Decrypt and parse one workbook into its snapshot, timing the work. A
+# workbook that only gained months since its last snapshot parses just those.
+def warm_workbook(path, password, snapshot_dir=SNAPSHOT_DIR):
+	start = time.perf_counter()
+	digest = workbook_digest(path)
+	cached = os.path.exists(snapshot_path(path, digest, snapshot_dir))
+	df, delta = ingest_workbook(path, password, snapshot_dir=snapshot_dir, digest=digest)
+	return {
+		"workbook": path,
+		"source": "snapshot" if cached else "excel" if delta is None else "incremental",
+		"rows": len(df),
+		"seconds": round(time.perf_counter() - start, 3),
+	}
+
+
+# Warm every workbook concurrently; msoffcrypto and openpyxl are pure Python so
+# this needs processes rather than threads. Slowest workbook is reported first.
+def warm_up(password, workbooks=None, snapshot_dir=SNAPSHOT_DIR, max_workers=None):
+	paths = list(workbooks or map(workbook_path, WORKBOOKS))
+	max_workers = max_workers or min(len(paths), os.cpu_count() or 1)
+	timings = []
+	# spawn, since forking a threaded Streamlit server is unsafe
+	context = multiprocessing.get_context("spawn")
+	with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as pool:
+		futures = {pool.submit(warm_workbook, path, password, snapshot_dir): path for path in paths}
+		for future in as_completed(futures):
+			try:
+				timing = future.result()
+			except Exception as e:
+				timing = {"workbook": futures[future], "source": "error", "rows": 0, "seconds": None, "error": repr(e)}
+				logger.warning("warm-up failed for %s: %r", futures[future], e)
+			else:
+				logger.info("warmed %s from %s in %.3fs (%d rows)", timing["workbook"], timing["source"], timing["seconds"], timing["rows"])
+			timings.append(timing)
+	timings.sort(key=lambda t: t["seconds"] or 0, reverse=True)
+	return timings
+
+
+# Run the warm-up in a fresh interpreter. Streamlit swaps its script in as
+# __main__, which spawned pool workers would otherwise re-execute. The warm-up
+# only saves later parses, so a failed run is logged and reported as a single
+# error entry; workbooks are then loaded on demand.
+def warm_up_in_subprocess(password, snapshot_dir=SNAPSHOT_DIR, max_workers=None):
+	command = [sys.executable, "-m", "india_accounts.warmup", "--json", "--snapshot-dir", snapshot_dir]
+	if max_workers:
+		command += ["--workers", str(max_workers)]
+	env = dict(os.environ, DB_PASSWORD=password)
+	try:
+		result = subprocess.run(command, env=env, capture_output=True, text=True, check=True)
+		timings = json.loads(result.stdout)
+	except (OSError, subprocess.CalledProcessError, ValueError) as e:
+		stderr = getattr(e, "stderr", None) or ""
+		logger.warning("warm-up failed, loading workbooks on demand: %r\n%s", e, stderr[-2000:])
+		return [{"workbook": "*", "source": "error", "rows": 0, "seconds": None, "error": repr(e)}]
+	for t in timings:
+		logger.info("warmed %s from %s in %ss (%d rows)", t["workbook"], t["source"], t["seconds"], t["rows"])
+	return timings
+
+
+# Background thread that warms a running app without holding up its first
+# page: snapshots every workbook in a subprocess (unless the store reads a
+# database, which needs none), then builds each category's default view in
+# the store. Sessions that get there first load on demand; the store's locks
+# keep the two from building the same thing twice.
+class WarmUpThread(threading.Thread):
+	def __init__(self, store, password, snapshot_dir=SNAPSHOT_DIR, snapshots=True):
+		super().__init__(name="warm-up", daemon=True)
+		self.store = store
+		self.password = password
+		self.snapshot_dir = snapshot_dir
+		self.snapshots = snapshots
+		self.timings = []
+
+	def run(self):
+		if self.snapshots:
+			self.timings = warm_up_in_subprocess(self.password, self.snapshot_dir)
+		for category in WORKBOOKS:
+			try:
+				self.store.get(category).view()
+			except Exception:
+				logger.exception("could not preload %s, loading it on demand", category)
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Decrypt and snapshot all budget workbooks before the app starts")
+	parser.add_argument("--workers", type=int, default=None, help="process pool size (default: one per workbook, capped at CPU count)")
+	parser.add_argument("--snapshot-dir", default=SNAPSHOT_DIR)
+	parser.add_argument("--json", action="store_true", help="print the per-file timings as JSON")
+	args = parser.parse_args()
+
+	start = time.perf_counter()
+	timings = warm_up(read_password(), snapshot_dir=args.snapshot_dir, max_workers=args.workers)
+	if args.json:
+		print(json.dumps(timings))
+		return
+	for t in timings:
+		seconds = "failed" if t["seconds"] is None else f'{t["seconds"]:.3f}s'
+		print(f'{t["workbook"]:<24} {t["source"]:<9} {t["rows"]:>7} rows  {seconds}')
+	print(f"total {time.perf_counter() - start:.3f}s")
+
+
+if __name__ == "__main__":
+	main()
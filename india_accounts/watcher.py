@@ -0,0 +1,51 @@
+import logging
+import os
+import threading
+
+from india_accounts.dataset import file_stamp
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks of the workbooks' size and mtime
+WATCH_INTERVAL = float(os.environ.get("INDIA_ACCOUNTS_WATCH_INTERVAL", "5"))
+
+
+# Background thread that refreshes a DataStore's datasets when their workbooks
+# change. Polling os.stat needs no extra dependency and also works on network
+# mounts. A file is only re-ingested once its stamp has held still for a poll,
+# so a workbook that is still being copied in is not read half written.
+class WorkbookWatcher(threading.Thread):
+	def __init__(self, store, interval=WATCH_INTERVAL):
+		super().__init__(name="workbook-watcher", daemon=True)
+		self.store = store
+		self.interval = interval
+		self._seen = {}
+		self._failed = {}
+		self._stopped = threading.Event()
+
+	def run(self):
+		while not self._stopped.wait(self.interval):
+			self.poll()
+
+	def stop(self):
+		self._stopped.set()
+
+	# Check every loaded category once; sessions keep serving the previous
+	# version until the store swaps the new one in
+	def poll(self):
+		for category in list(self.store.datasets):
+			try:
+				stamp = file_stamp(self.store.path(category))
+			except OSError:
+				# Being replaced right now
+				continue
+			settled = self._seen.get(category) == stamp
+			self._seen[category] = stamp
+			if not settled or self._failed.get(category) == stamp:
+				continue
+			try:
+				self.store.refresh(category)
+			except Exception:
+				# Retried once the file changes again
+				self._failed[category] = stamp
+				logger.exception("refreshing %s failed, still serving the previous version", category)
@@ -0,0 +1,171 @@
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from india_accounts.config import ORDER_LISTS
+from india_accounts.dataset import CategoryDataset
+from india_accounts.snapshot import WorkbookChanged, decrypt_workbook, ingest_workbook, read_snapshot, snapshot_path, workbook_digest
+from india_accounts.synth import expenditure_items, month_ends, synth_table, write_encrypted_workbook
+
+PASSWORD = "pw"
+MONTHS = 30
+KNOWN_MONTHS = 24
+
+
+# Seeded table of a category over MONTHS months
+def make_table(category, seed=0):
+	rng = np.random.default_rng(seed)
+	descriptions = ORDER_LISTS[category] or expenditure_items(20, rng)
+	return synth_table(category, month_ends(2019, MONTHS), descriptions, rng)
+
+
+def first_months(table, months=KNOWN_MONTHS):
+	dates = table['Date'].unique()[:months]
+	return table[table['Date'].isin(dates)].reset_index(drop=True)
+
+
+# A workbook written at its first KNOWN_MONTHS and ingested, then rewritten as
+# `grown`: (path, snapshot dir, known raw frame)
+@pytest.fixture
+def grown_workbook(tmp_path):
+	def grow(table, grown):
+		path = str(tmp_path / "T01_Main.xlsx")
+		snapshot_dir = str(tmp_path / "snapshots")
+		write_encrypted_workbook(first_months(table), path, PASSWORD)
+		known, _ = ingest_workbook(path, PASSWORD, snapshot_dir=snapshot_dir)
+		write_encrypted_workbook(grown, path, PASSWORD)
+		return path, snapshot_dir, known
+	return grow
+
+
+def assert_same_raw(df, expected):
+	pd.testing.assert_frame_equal(df.reset_index(drop=True), expected.reset_index(drop=True), check_dtype=False)
+
+
+def test_ingest_appends_new_months(grown_workbook):
+	table = make_table("Account Summary")
+	path, snapshot_dir, known = grown_workbook(table, table)
+
+	df, delta = ingest_workbook(path, PASSWORD, known, snapshot_dir=snapshot_dir)
+
+	assert delta is not None
+	assert set(delta['Date']) == set(table['Date']) - set(known['Date'])
+	assert_same_raw(df, decrypt_workbook(path, PASSWORD))
+	# The snapshot of the new version holds the whole table
+	assert_same_raw(read_snapshot(snapshot_path(path, workbook_digest(path), snapshot_dir), PASSWORD), df)
+
+
+def test_ingest_rereads_revised_months(grown_workbook):
+	table = make_table("Account Summary")
+	revised = table.copy()
+	revised.loc[0, 'BE'] = 123456789.0
+	path, snapshot_dir, known = grown_workbook(table, revised)
+
+	df, delta = ingest_workbook(path, PASSWORD, known, snapshot_dir=snapshot_dir)
+
+	assert delta is None
+	assert df.loc[0, 'BE'] == 123456789.0
+	assert_same_raw(df, decrypt_workbook(path, PASSWORD))
+	# A cold process starting from the snapshot serves the revision too
+	cold, _ = ingest_workbook(path, PASSWORD, snapshot_dir=snapshot_dir)
+	assert cold.loc[0, 'BE'] == 123456789.0
+
+
+@pytest.mark.parametrize("revise", [False, True])
+def test_ingest_reuses_another_process_snapshot(grown_workbook, revise):
+	table = make_table("Account Summary")
+	grown = table.copy()
+	if revise:
+		grown.loc[0, 'BE'] = 123456789.0
+	path, snapshot_dir, known = grown_workbook(table, grown)
+	# Another worker already snapshotted the new version
+	ingest_workbook(path, PASSWORD, snapshot_dir=snapshot_dir)
+
+	df, delta = ingest_workbook(path, PASSWORD, known, snapshot_dir=snapshot_dir)
+
+	assert (delta is None) == revise
+	if not revise:
+		assert set(delta['Date']) == set(table['Date']) - set(known['Date'])
+	assert_same_raw(df, decrypt_workbook(path, PASSWORD))
+
+
+def test_ingest_refuses_a_replaced_workbook(grown_workbook, tmp_path):
+	table = make_table("Account Summary")
+	path, snapshot_dir, _ = grown_workbook(table, first_months(table))
+	digest = workbook_digest(path)
+	write_encrypted_workbook(table, path, PASSWORD)
+
+	with pytest.raises(WorkbookChanged):
+		ingest_workbook(path, PASSWORD, snapshot_dir=str(tmp_path / "empty"), digest=digest)
+
+
+def view_keys(category):
+	if category == "Expenditure Details":
+		return [('All', 15), ('Capital', 3), ('Revenue', 40)]
+	return [()]
+
+
+def assert_same_view(view, expected):
+	pd.testing.assert_frame_equal(view.df.reset_index(drop=True), expected.df.reset_index(drop=True))
+	assert view.dates == expected.dates
+	assert view.totals_by_date == expected.totals_by_date
+	assert {key: value for key, value in view.axes.items()} == expected.axes
+	assert (view.palette == expected.palette).all()
+
+
+# A dataset at the first KNOWN_MONTHS with its views built, and the raw frame
+# of the whole table and its new months
+def extend_case(category, backfill=False):
+	table = make_table(category)
+	dates = table['Date'].unique()
+	if backfill:
+		# A month from the middle arrives late
+		late = dates[KNOWN_MONTHS // 2]
+		known, delta = table[table['Date'] != late], table[table['Date'] == late]
+	else:
+		known, delta = first_months(table), table[table['Date'].isin(dates[KNOWN_MONTHS:])]
+	known, delta = known.reset_index(drop=True), delta.reset_index(drop=True)
+	dataset = CategoryDataset(category, known.copy(), "v1")
+	for key in view_keys(category):
+		dataset.view(*key)
+	raw = pd.concat([known, delta], ignore_index=True)
+	return dataset, raw, delta
+
+
+@pytest.mark.parametrize("category", ["Account Summary", "Tax Details", "Expenditure Details"])
+@pytest.mark.parametrize("backfill", [False, True])
+def test_extend_matches_a_full_rebuild(category, backfill):
+	dataset, raw, delta = extend_case(category, backfill)
+
+	extended = dataset.extend(delta.copy(), raw.copy(), "v2")
+	fresh = CategoryDataset(category, raw.copy(), "v2")
+
+	for key in view_keys(category):
+		assert_same_view(extended.view(*key), fresh.view(*key))
+
+
+def test_extend_while_sessions_read_views():
+	# A backfilled month keeps the ranking, so every top-N view is extended
+	dataset, raw, delta = extend_case("Expenditure Details", backfill=True)
+	stop = threading.Event()
+	errors = []
+
+	def rerun():
+		try:
+			while not stop.is_set():
+				for key in view_keys("Expenditure Details"):
+					dataset.view(*key)
+		except Exception as e:
+			errors.append(e)
+
+	reader = threading.Thread(target=rerun)
+	reader.start()
+	try:
+		for _ in range(5):
+			dataset.extend(delta.copy(), raw.copy(), "v2")
+	finally:
+		stop.set()
+		reader.join()
+	assert errors == []
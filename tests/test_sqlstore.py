@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from india_accounts.config import ORDER_LISTS, WORKBOOKS
+from india_accounts.dataset import DataStore
+from india_accounts.sqlstore import SqlStore, build_database
+from india_accounts.synth import expenditure_items, month_ends, synth_table, write_encrypted_workbook
+
+PASSWORD = "pw"
+CATEGORIES = ["Account Summary", "Tax Details", "Expenditure Details"]
+
+
+@pytest.fixture(scope="module")
+def stores(tmp_path_factory):
+	data_dir = tmp_path_factory.mktemp("data")
+	snapshot_dir = str(tmp_path_factory.mktemp("snapshots"))
+	for category in CATEGORIES:
+		rng = np.random.default_rng(1)
+		descriptions = ORDER_LISTS[category] or expenditure_items(20, rng)
+		table = synth_table(category, month_ends(2019, 30), descriptions, rng)
+		write_encrypted_workbook(table, str(data_dir / WORKBOOKS[category]), PASSWORD)
+	db_path = str(data_dir / "budget.sqlite")
+	build_database(PASSWORD, db_path, str(data_dir), snapshot_dir, CATEGORIES)
+	return DataStore(PASSWORD, str(data_dir), snapshot_dir, shared_dir=""), SqlStore(db_path)
+
+
+@pytest.mark.parametrize("category, key", [
+	("Account Summary", ()),
+	("Tax Details", ()),
+	("Expenditure Details", ('All', 15)),
+	("Expenditure Details", ('Capital', 4)),
+])
+def test_sql_view_draws_what_the_memory_view_draws(stores, category, key):
+	memory, sql = stores
+	expected = memory.get(category).view(*key)
+	view = sql.get(category).view(*key)
+
+	assert view.dates == expected.dates
+	assert view.calendar.dates == expected.calendar.dates
+	assert view.axes == expected.axes
+	assert view.totals_by_date == expected.totals_by_date
+	assert (view.palette == expected.palette).all()
+	for date in expected.dates:
+		pd.testing.assert_frame_equal(view.frames_by_date[date].reset_index(drop=True), expected.frames_by_date[date].reset_index(drop=True))
+	assert len(view.frames_by_date._frames) <= view.frames_by_date.size